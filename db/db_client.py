@@ -1,20 +1,42 @@
 import logging
 import os
 import sqlite3
+import threading
 
 
 logger = logging.getLogger(__name__)
 
+# Connections reused by the helpers below, one per worker thread and database file; sqlite3 connections may only be
+# used on the thread that opened them, and they are released when their thread exits
+_thread_local = threading.local()
 
-def get_connection():
-    """Get database connection"""
+
+def _database_path():
     # Use absolute path to ensure database is created in the correct location
     default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "sqlite.db")
-    path = os.getenv("DATABASE_PATH", default_path)
+    return os.getenv("DATABASE_PATH", default_path)
+
+
+def _connect(path):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     return sqlite3.connect(path)
 
 
+def get_connection():
+    """Get a new database connection; the caller closes it"""
+    return _connect(_database_path())
+
+
+def _thread_connection():
+    """Return this thread's persistent connection, opening it on first use"""
+    path = _database_path()
+    connections = _thread_local.__dict__.setdefault("connections", {})
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _connect(path)
+    return conn
+
+
 def init_schema():
     """Initialize database schema - simple and clean"""
     conn = get_connection()
@@ -358,6 +380,13 @@ def init_schema():
 
         # Basic indexes only - V2 tables
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_usersV2_tenant ON usersV2(tenant_id)")
+        # Composite indexes for the tenant-scoped list endpoints: equality on tenant_id, then the sort/range column
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_usersV2_tenant_name ON usersV2(tenant_id, display_name)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_usersV2_tenant_signin ON usersV2(tenant_id, last_sign_in_date) "
+            "WHERE last_sign_in_date IS NOT NULL"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_licensesV2_active ON user_licensesV2(tenant_id, user_id) WHERE is_active = 1")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_licenses_tenant ON licenses(tenant_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_roles_tenant ON roles(tenant_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_rolesV2_tenant ON user_rolesV2(tenant_id)")
@@ -402,7 +431,7 @@ def upsert_many(table, records):
     if not records:
         return 0
 
-    conn = get_connection()
+    conn = _thread_connection()
     cursor = conn.cursor()
 
     try:
@@ -423,15 +452,19 @@ def upsert_many(table, records):
         conn.rollback()
         logger.error(f"Failed to upsert records: {str(e)}")
         raise
-    finally:
-        conn.close()
 
 
-def query(sql, params=None):
-    """Execute a SELECT query and return results as list of dictionaries"""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
+def query(sql, params=None, conn=None):
+    """
+    Execute a SELECT query and return results as list of dictionaries.
+
+    Pass an open `conn` to run several queries of one request on the same connection;
+    it is left open for the caller to close.
+    """
+    if conn is None:
+        conn = _thread_connection()
     cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
 
     try:
         if params:
@@ -445,13 +478,11 @@ def query(sql, params=None):
     except Exception as e:
         logger.error(f"Query failed: {sql} with params {params}: {e}")
         raise
-    finally:
-        conn.close()
 
 
 def execute_query(sql, params=None):
     """Execute an INSERT, UPDATE, or DELETE query"""
-    conn = get_connection()
+    conn = _thread_connection()
     cursor = conn.cursor()
 
     try:
@@ -467,13 +498,31 @@ def execute_query(sql, params=None):
         logger.error(f"Execute query failed: {sql} with params {params}: {e}")
         conn.rollback()
         raise
-    finally:
-        conn.close()
+
+
+def execute_transaction(statements):
+    """Execute several (sql, params) statements on one connection and commit them together"""
+    conn = _thread_connection()
+    cursor = conn.cursor()
+
+    try:
+        rowcounts = []
+        for sql, params in statements:
+            cursor.execute(sql, params)
+            rowcounts.append(cursor.rowcount)
+
+        conn.commit()
+        return rowcounts
+
+    except Exception as e:
+        logger.error(f"Transaction failed after {len(rowcounts)} of {len(statements)} statements: {e}")
+        conn.rollback()
+        raise
 
 
 def execute_many(sql, params_list):
     """Execute a query with multiple parameter sets"""
-    conn = get_connection()
+    conn = _thread_connection()
     cursor = conn.cursor()
 
     try:
@@ -485,5 +534,3 @@ def execute_many(sql, params_list):
         logger.error(f"Execute many failed: {sql} with {len(params_list)} parameter sets: {e}")
         conn.rollback()
         raise
-    finally:
-        conn.close()
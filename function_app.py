@@ -18,7 +18,7 @@ from functions.groups.http import get_groups, http_group_sync
 from functions.groups.timer import timer_groups_sync
 from functions.licenses.http import get_licenses, http_licenses_sync, http_subscription_sync
 from functions.licenses.timer import timer_licenses_sync, timer_subscriptions_sync
-from functions.reports.timer import generate_report_now, generate_user_report
+from functions.reports.timer import REPORT_BLOB_PATH, generate_report_now, generate_report_worker, generate_user_report
 from functions.roles.http import get_roles, http_sync_roles
 from functions.roles.timer import timer_roles_sync
 from functions.users.http import (
@@ -49,8 +49,8 @@ app.timer_trigger(schedule="0 */1 * * * *", arg_name="timer", run_on_startup=Fal
 # License sync - every minute at second 15
 app.timer_trigger(schedule="15 */1 * * * *", arg_name="timer", run_on_startup=False, use_monitor=False)(timer_licenses_sync)
 
-# Role sync - every 2 minutes at second 0
-app.timer_trigger(schedule="0 */2 * * * *", arg_name="timer", run_on_startup=False, use_monitor=False)(timer_roles_sync)
+# Role sync - every 2 minutes at second 20 (second 0 is taken by the user sync)
+app.timer_trigger(schedule="20 */2 * * * *", arg_name="timer", run_on_startup=False, use_monitor=False)(timer_roles_sync)
 
 # Group sync - every minute at second 30
 app.timer_trigger(schedule="30 */1 * * * *", arg_name="timer", run_on_startup=False, use_monitor=False)(timer_groups_sync)
@@ -79,8 +79,19 @@ app.timer_trigger(schedule="0 0 4 * * *", arg_name="timer", run_on_startup=False
 # # # Group analysis - every hour at minute 15
 # app.timer_trigger(schedule="0 15 * * * *", arg_name="timer", run_on_startup=False, use_monitor=False)(get_groups_analysis)
 
-# Daily report generation - every day at 6 AM
-app.timer_trigger(schedule="0 0 6 * * *", arg_name="timer", run_on_startup=False, use_monitor=False)(generate_user_report)
+# Daily report generation - every day at 6 AM; the full JSON report is written to the reports container
+app.timer_trigger(schedule="0 0 6 * * *", arg_name="timer", run_on_startup=False, use_monitor=False)(
+    app.blob_output(arg_name="outblob", path=REPORT_BLOB_PATH, connection="AzureWebJobsStorage")(generate_user_report)
+)
+
+# =============================================================================
+# QUEUE TRIGGERS (Background Jobs)
+# =============================================================================
+
+# Report jobs queued by the generate-report-now endpoint
+app.queue_trigger(arg_name="msg", queue_name="report-jobs", connection="AzureWebJobsStorage")(
+    app.blob_output(arg_name="outblob", path=REPORT_BLOB_PATH, connection="AzureWebJobsStorage")(generate_report_worker)
+)
 
 # =============================================================================
 # HTTP TRIGGERS (API Endpoints)
@@ -142,4 +153,6 @@ app.route(route="tenant/devices", methods=["GET"])(get_devices)
 
 
 # Reporting Endpoints
-app.route(route="generate-report-now", methods=["GET", "POST"])(generate_report_now)
+app.route(route="generate-report-now", methods=["GET", "POST"])(
+    app.queue_output(arg_name="msg", queue_name="report-jobs", connection="AzureWebJobsStorage")(generate_report_now)
+)
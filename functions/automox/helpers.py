@@ -1,16 +1,50 @@
 from datetime import datetime
 import logging
+import threading
+import time
 from typing import Any
 
+import orjson
 import pytz
 
-from db.db_client import init_schema, upsert_many
+from db.db_client import get_connection, init_schema, upsert_many
 from shared.amx_api import AutomoxApi, AutomoxError, format_datetime
 from shared.utils import clean_error_message
 
 
 logger = logging.getLogger(__name__)
 
+# Dashboards poll the stats endpoints far more often than the nightly syncs change the tables
+STATS_CACHE_TTL_SECONDS = 60
+_stats_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+_stats_cache_lock = threading.Lock()
+
+
+def get_cached_statistics(key: str, compute) -> dict[str, Any]:
+    """
+    Return statistics from the short-lived cache, computing them with `compute` on a miss.
+
+    Results carrying an "error" field are returned but never cached.
+    """
+    entry = _stats_cache.get(key)
+    if entry and time.monotonic() - entry[0] < STATS_CACHE_TTL_SECONDS:
+        return entry[1]
+
+    with _stats_cache_lock:
+        entry = _stats_cache.get(key)
+        if entry and time.monotonic() - entry[0] < STATS_CACHE_TTL_SECONDS:
+            return entry[1]
+
+        stats = compute()
+        if "error" not in stats:
+            _stats_cache[key] = (time.monotonic(), stats)
+        return stats
+
+
+def invalidate_statistics_cache() -> None:
+    """Drop cached statistics so the next request reflects freshly synced data"""
+    _stats_cache.clear()
+
 
 def transform_organization_data(org_data: dict[str, Any]) -> dict[str, Any]:
     """
@@ -53,7 +87,7 @@ def sync_automox_organizations() -> dict[str, Any]:
         Dictionary containing sync results and statistics
     """
     logger.info("Starting Automox organizations sync")
-    start_time = datetime.now(pytz.UTC)
+    start_time = time.perf_counter()
 
     try:
         # Initialize database schema
@@ -69,7 +103,7 @@ def sync_automox_organizations() -> dict[str, Any]:
                 return {
                     "status": "success",
                     "organizations_synced": 0,
-                    "duration_seconds": (datetime.now(pytz.UTC) - start_time).total_seconds(),
+                    "duration_seconds": time.perf_counter() - start_time,
                     "message": "No organizations found to sync",
                 }
 
@@ -90,14 +124,15 @@ def sync_automox_organizations() -> dict[str, Any]:
                 return {
                     "status": "error",
                     "error": "No valid organizations to sync after transformation",
-                    "duration_seconds": (datetime.now(pytz.UTC) - start_time).total_seconds(),
+                    "duration_seconds": time.perf_counter() - start_time,
                 }
 
             # Insert/update organizations in database
             logger.info(f"Syncing {len(transformed_orgs)} organizations to database")
             upsert_many("amx_orgs", transformed_orgs)
+            invalidate_statistics_cache()
 
-            duration = (datetime.now(pytz.UTC) - start_time).total_seconds()
+            duration = time.perf_counter() - start_time
             logger.info(f"Successfully synced {len(transformed_orgs)} organizations in {duration:.2f}s")
 
             return {
@@ -110,12 +145,12 @@ def sync_automox_organizations() -> dict[str, Any]:
     except AutomoxError as e:
         error_msg = f"Automox API error: {clean_error_message(str(e))}"
         logger.error(error_msg)
-        return {"status": "error", "error": error_msg, "duration_seconds": (datetime.now(pytz.UTC) - start_time).total_seconds()}
+        return {"status": "error", "error": error_msg, "duration_seconds": time.perf_counter() - start_time}
 
     except Exception as e:
         error_msg = f"Unexpected error during Automox organizations sync: {clean_error_message(str(e))}"
         logger.error(error_msg)
-        return {"status": "error", "error": error_msg, "duration_seconds": (datetime.now(pytz.UTC) - start_time).total_seconds()}
+        return {"status": "error", "error": error_msg, "duration_seconds": time.perf_counter() - start_time}
 
 
 def get_organization_statistics() -> dict[str, Any]:
@@ -126,26 +161,22 @@ def get_organization_statistics() -> dict[str, Any]:
         Dictionary containing organization statistics
     """
     try:
-        from db.db_client import get_connection
-
         conn = get_connection()
         cursor = conn.cursor()
 
-        # Get total count
-        cursor.execute("SELECT COUNT(*) FROM amx_orgs")
-        total_orgs = cursor.fetchone()[0]
-
-        # Get organizations with devices
-        cursor.execute("SELECT COUNT(*) FROM amx_orgs WHERE device_count > 0")
-        orgs_with_devices = cursor.fetchone()[0]
-
-        # Get total device count
-        cursor.execute("SELECT SUM(device_count) FROM amx_orgs WHERE device_count IS NOT NULL")
-        total_devices = cursor.fetchone()[0] or 0
-
-        # Get latest sync time
-        cursor.execute("SELECT MAX(last_updated) FROM amx_orgs")
-        latest_sync = cursor.fetchone()[0]
+        # All organization counters in a single pass over amx_orgs
+        cursor.execute(
+            """
+            SELECT COUNT(*),
+                   SUM(CASE WHEN device_count > 0 THEN 1 ELSE 0 END),
+                   SUM(device_count),
+                   MAX(last_updated)
+            FROM amx_orgs
+            """
+        )
+        total_orgs, orgs_with_devices, total_devices, latest_sync = cursor.fetchone()
+        orgs_with_devices = orgs_with_devices or 0
+        total_devices = total_devices or 0
 
         conn.close()
 
@@ -172,8 +203,6 @@ def transform_device_data(device_data: dict[str, Any], org_id: int) -> tuple[dic
     Returns:
         Tuple of (device_data, device_details_data) for database storage
     """
-    import json
-
     # Handle IP addresses - convert string to list if needed
     ip_addrs = device_data.get("ip_addrs", "")
     if isinstance(ip_addrs, str) and ip_addrs:
@@ -194,8 +223,8 @@ def transform_device_data(device_data: dict[str, Any], org_id: int) -> tuple[dic
         "needs_reboot": device_data.get("needs_reboot"),
         "next_patch_time": format_datetime(device_data.get("next_patch_time")),  # Now available with include_next_patch_time=1
         "inventory_last_refresh_time": format_datetime(device_data.get("last_refresh_time")),
-        "ip_addrs": json.dumps(ip_addrs),
-        "ip_addrs_private": json.dumps(device_data.get("ip_addrs_private", [])),  # Now available with include_details=1
+        "ip_addrs": orjson.dumps(ip_addrs).decode(),
+        "ip_addrs_private": orjson.dumps(device_data.get("ip_addrs_private", [])).decode(),  # Now available with include_details=1
         "created_at": datetime.now(pytz.UTC).isoformat(),
         "last_updated": datetime.now(pytz.UTC).isoformat(),
     }
@@ -237,7 +266,7 @@ def sync_automox_devices() -> dict[str, Any]:
         Dictionary containing sync results and statistics
     """
     logger.info("Starting Automox devices sync")
-    start_time = datetime.now(pytz.UTC)
+    start_time = time.perf_counter()
 
     try:
         # Initialize database schema
@@ -253,7 +282,7 @@ def sync_automox_devices() -> dict[str, Any]:
                 return {
                     "status": "success",
                     "devices_synced": 0,
-                    "duration_seconds": (datetime.now(pytz.UTC) - start_time).total_seconds(),
+                    "duration_seconds": time.perf_counter() - start_time,
                     "message": "No organizations found to sync devices for",
                 }
 
@@ -311,7 +340,9 @@ def sync_automox_devices() -> dict[str, Any]:
                     org_results.append({"org_id": org_id, "org_name": org_name, "devices_synced": 0, "error": str(e)})
                     continue
 
-            duration = (datetime.now(pytz.UTC) - start_time).total_seconds()
+            invalidate_statistics_cache()
+
+            duration = time.perf_counter() - start_time
             logger.info(f"Successfully synced {total_devices} devices across {len(orgs_data)} organizations in {duration:.2f}s")
 
             return {
@@ -326,12 +357,12 @@ def sync_automox_devices() -> dict[str, Any]:
     except AutomoxError as e:
         error_msg = f"Automox API error: {clean_error_message(str(e))}"
         logger.error(error_msg)
-        return {"status": "error", "error": error_msg, "duration_seconds": (datetime.now(pytz.UTC) - start_time).total_seconds()}
+        return {"status": "error", "error": error_msg, "duration_seconds": time.perf_counter() - start_time}
 
     except Exception as e:
         error_msg = f"Unexpected error during Automox devices sync: {clean_error_message(str(e))}"
         logger.error(error_msg)
-        return {"status": "error", "error": error_msg, "duration_seconds": (datetime.now(pytz.UTC) - start_time).total_seconds()}
+        return {"status": "error", "error": error_msg, "duration_seconds": time.perf_counter() - start_time}
 
 
 def get_device_statistics() -> dict[str, Any]:
@@ -342,39 +373,31 @@ def get_device_statistics() -> dict[str, Any]:
         Dictionary containing device statistics
     """
     try:
-        from db.db_client import get_connection
-
         conn = get_connection()
         cursor = conn.cursor()
 
-        # Get total device count
-        cursor.execute("SELECT COUNT(*) FROM amx_devices")
-        total_devices = cursor.fetchone()[0]
-
-        # Get connected devices
-        cursor.execute("SELECT COUNT(*) FROM amx_devices WHERE connected = 1")
-        connected_devices = cursor.fetchone()[0]
-
-        # Get compliant devices
-        cursor.execute("SELECT COUNT(*) FROM amx_devices WHERE is_compliant = 1")
-        compliant_devices = cursor.fetchone()[0]
-
-        # Get devices by OS family
-        cursor.execute("SELECT os_family, COUNT(*) FROM amx_devices WHERE os_family IS NOT NULL GROUP BY os_family")
+        # All scalar device counters in a single pass over amx_devices
+        cursor.execute(
+            """
+            SELECT COUNT(*),
+                   SUM(CASE WHEN connected = 1 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN is_compliant = 1 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN needs_reboot = 1 THEN 1 ELSE 0 END),
+                   SUM(pending_patches),
+                   MAX(last_updated)
+            FROM amx_devices
+            """
+        )
+        total_devices, connected_devices, compliant_devices, needs_reboot, total_pending_patches, latest_sync = cursor.fetchone()
+        connected_devices = connected_devices or 0
+        compliant_devices = compliant_devices or 0
+        needs_reboot = needs_reboot or 0
+        total_pending_patches = total_pending_patches or 0
+
+        # Get devices by OS family (stored with the device details)
+        cursor.execute("SELECT os_family, COUNT(*) FROM amx_device_details WHERE os_family IS NOT NULL GROUP BY os_family")
         os_families = dict(cursor.fetchall())
 
-        # Get devices needing reboot
-        cursor.execute("SELECT COUNT(*) FROM amx_devices WHERE needs_reboot = 1")
-        needs_reboot = cursor.fetchone()[0]
-
-        # Get total pending patches
-        cursor.execute("SELECT SUM(pending_patches) FROM amx_devices WHERE pending_patches IS NOT NULL")
-        total_pending_patches = cursor.fetchone()[0] or 0
-
-        # Get latest sync time
-        cursor.execute("SELECT MAX(last_updated) FROM amx_devices")
-        latest_sync = cursor.fetchone()[0]
-
         conn.close()
 
         return {
@@ -2,24 +2,30 @@ import logging
 
 import azure.functions as func
 
+from db.db_client import get_connection
 from functions.automox.helpers import (
+    get_cached_statistics,
     get_device_statistics,
     get_organization_statistics,
     sync_automox_devices,
     sync_automox_organizations,
 )
-from shared.utils import create_error_response, create_success_response
+from shared.utils import create_error_response, create_success_response, run_blocking_sync
 
 
 logger = logging.getLogger(__name__)
 
 
-def http_amx_orgs_sync(req: func.HttpRequest) -> func.HttpResponse:
+async def http_amx_orgs_sync(req: func.HttpRequest) -> func.HttpResponse:
     """
     HTTP trigger to manually sync Automox organizations.
 
     GET /api/amx/orgs/sync - Sync organizations from Automox API
     """
+    return await run_blocking_sync(_run_amx_orgs_sync)
+
+
+def _run_amx_orgs_sync() -> func.HttpResponse:
     try:
         logger.info("Starting manual Automox organizations sync")
 
@@ -57,7 +63,7 @@ def http_amx_orgs_stats(req: func.HttpRequest) -> func.HttpResponse:
         logger.info("Fetching Automox organizations statistics")
 
         # Get statistics
-        stats = get_organization_statistics()
+        stats = get_cached_statistics("organizations", get_organization_statistics)
 
         return create_success_response(
             data=stats,
@@ -82,8 +88,6 @@ def http_amx_orgs_list(req: func.HttpRequest) -> func.HttpResponse:
     GET /api/amx/orgs - List all organizations
     """
     try:
-        from db.db_client import get_connection
-
         logger.info("Fetching all Automox organizations")
 
         conn = get_connection()
@@ -118,12 +122,16 @@ def http_amx_orgs_list(req: func.HttpRequest) -> func.HttpResponse:
         )
 
 
-def http_amx_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
+async def http_amx_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
     """
     HTTP trigger to manually sync Automox devices.
 
     POST /api/amx/devices/sync - Sync devices from Automox API
     """
+    return await run_blocking_sync(_run_amx_devices_sync)
+
+
+def _run_amx_devices_sync() -> func.HttpResponse:
     try:
         logger.info("Starting manual Automox devices sync")
 
@@ -165,7 +173,7 @@ def http_amx_devices_stats(req: func.HttpRequest) -> func.HttpResponse:
         logger.info("Fetching Automox devices statistics")
 
         # Get statistics
-        stats = get_device_statistics()
+        stats = get_cached_statistics("devices", get_device_statistics)
 
         return create_success_response(
             data=stats,
@@ -190,8 +198,6 @@ def http_amx_devices_list(req: func.HttpRequest) -> func.HttpResponse:
     GET /api/amx/devices - List all devices
     """
     try:
-        from db.db_client import get_connection
-
         logger.info("Fetching all Automox devices")
 
         conn = get_connection()
@@ -1,5 +1,5 @@
-from datetime import datetime
 import logging
+import time
 
 import azure.functions as func
 
@@ -19,7 +19,7 @@ def timer_amx_org_sync(timer: func.TimerRequest) -> None:
         logger.info("The timer is past due!")
 
     logger.info("Starting scheduled Automox organizations sync")
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     try:
         # Sync organization data
@@ -39,8 +39,7 @@ def timer_amx_org_sync(timer: func.TimerRequest) -> None:
         error_msg = f"Automox organizations timer function failed: {clean_error_message(str(e))}"
         logger.error(error_msg)
 
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         logger.error(f"Automox organizations sync failed after {duration:.2f}s: {error_msg}")
 
 
@@ -53,7 +52,7 @@ def timer_amx_devices_sync(timer: func.TimerRequest) -> None:
         logger.info("The timer is past due!")
 
     logger.info("Starting scheduled Automox devices sync")
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     try:
         # Sync device data
@@ -74,6 +73,5 @@ def timer_amx_devices_sync(timer: func.TimerRequest) -> None:
         error_msg = f"Automox devices timer function failed: {clean_error_message(str(e))}"
         logger.error(error_msg)
 
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         logger.error(f"Automox devices sync failed after {duration:.2f}s: {error_msg}")
@@ -2,6 +2,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import UTC, datetime
 import logging
 import re
+import time
 from typing import Any
 
 from db.db_client import upsert_many
@@ -12,6 +13,38 @@ from shared.utils import clean_error_message
 
 logger = logging.getLogger(__name__)
 
+# Words ignored when comparing company and tenant names
+BUSINESS_SUFFIXES = frozenset(
+    {
+        "inc",
+        "llc",
+        "corp",
+        "corporation",
+        "company",
+        "co",
+        "ltd",
+        "limited",
+        "the",
+        "of",
+        "and",
+        "&",
+        "associates",
+        "assoc",
+        "group",
+        "partners",
+        "partnership",
+        "llp",
+        "pc",
+        "p.c.",
+        "apc",
+        "a.p.c.",
+        "dba",
+        "d.b.a.",
+    }
+)
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
 
 def clean_undefined_value(value: Any) -> Any:
     """
@@ -63,35 +96,8 @@ def get_tenant_id_from_company_name(company_name: str, tenants: list[dict[str, A
     company_lower = company_name.lower()
 
     # Pre-process company name for word matching
-    business_suffixes = {
-        "inc",
-        "llc",
-        "corp",
-        "corporation",
-        "company",
-        "co",
-        "ltd",
-        "limited",
-        "the",
-        "of",
-        "and",
-        "&",
-        "associates",
-        "assoc",
-        "group",
-        "partners",
-        "partnership",
-        "llp",
-        "pc",
-        "p.c.",
-        "apc",
-        "a.p.c.",
-        "dba",
-        "d.b.a.",
-    }
-
-    cleaned_words = re.sub(r"[^\w\s]", " ", company_lower).split()
-    company_words = {word for word in cleaned_words if word not in business_suffixes}
+    cleaned_words = _NON_WORD_RE.sub(" ", company_lower).split()
+    company_words = {word for word in cleaned_words if word not in BUSINESS_SUFFIXES}
 
     # Single pass through tenants with multiple matching strategies
     best_match = None
@@ -127,8 +133,8 @@ def get_tenant_id_from_company_name(company_name: str, tenants: list[dict[str, A
 
             # Check display name
             if isinstance(display_name, str):
-                cleaned_tenant_words = re.sub(r"[^\w\s]", " ", display_name.lower()).split()
-                tenant_words = {word for word in cleaned_tenant_words if word not in business_suffixes}
+                cleaned_tenant_words = _NON_WORD_RE.sub(" ", display_name.lower()).split()
+                tenant_words = {word for word in cleaned_tenant_words if word not in BUSINESS_SUFFIXES}
                 if tenant_words:
                     intersection = len(company_words.intersection(tenant_words))
                     union = len(company_words.union(tenant_words))
@@ -136,8 +142,8 @@ def get_tenant_id_from_company_name(company_name: str, tenants: list[dict[str, A
 
             # Check primary domain
             if isinstance(primary_domain, str):
-                cleaned_domain_words = re.sub(r"[^\w\s]", " ", primary_domain.lower()).split()
-                domain_words = {word for word in cleaned_domain_words if word not in business_suffixes}
+                cleaned_domain_words = _NON_WORD_RE.sub(" ", primary_domain.lower()).split()
+                domain_words = {word for word in cleaned_domain_words if word not in BUSINESS_SUFFIXES}
                 if domain_words:
                     intersection = len(company_words.intersection(domain_words))
                     union = len(company_words.union(domain_words))
@@ -319,7 +325,7 @@ def sync_backup_radar_data(tenants: list[dict[str, Any]]) -> dict[str, Any]:
     Fetches both active and retired backups and stores them in the database.
     """
     logger.info("Starting Backup Radar sync for all tenants")
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     total_active_backups = 0
     total_retired_backups = 0
@@ -360,7 +366,7 @@ def sync_backup_radar_data(tenants: list[dict[str, Any]]) -> dict[str, Any]:
 
         # Calculate summary
         end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
 
         summary = {
             "total_active_backups": total_active_backups,
@@ -386,7 +392,7 @@ def sync_backup_radar_data(tenants: list[dict[str, Any]]) -> dict[str, Any]:
         logger.error(error_msg)
 
         end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
 
         return {
             "total_active_backups": total_active_backups,
@@ -404,7 +410,7 @@ def sync_backup_radar_for_tenant(tenant_id: str, tenants: list[dict[str, Any]],
     Sync Backup Radar data for a specific tenant.
     """
     logger.info(f"Starting Backup Radar sync for tenant: {tenant_id}")
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     # Find the specific tenant
     tenant = next((t for t in tenants if t["tenant_id"] == tenant_id), None)
@@ -448,7 +454,7 @@ def sync_backup_radar_for_tenant(tenant_id: str, tenants: list[dict[str, Any]],
                 total_retired = sum(1 for item in all_mapped_data if item.get("is_retired") == 1)
 
         end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
 
         logger.info(
             f"Backup Radar sync for tenant {tenant_id} completed: {total_active} active, {total_retired} retired backups in {duration:.2f}s"
@@ -469,7 +475,7 @@ def sync_backup_radar_for_tenant(tenant_id: str, tenants: list[dict[str, Any]],
         logger.error(error_msg)
 
         end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
 
         return {
             "tenant_id": tenant_id,
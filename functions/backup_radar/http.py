@@ -3,32 +3,38 @@ import logging
 
 import azure.functions as func
 
-from db.db_client import query
+from db.db_client import get_connection, query
 from functions.backup_radar.helpers import sync_backup_radar_data, sync_backup_radar_for_tenant
+from shared.backup_radar_api import get_backup_overview
 from shared.graph_client import get_tenants
-from shared.utils import clean_error_message, create_error_response, create_success_response
+from shared.utils import clean_error_message, create_error_response, create_success_response, run_blocking_sync
 
 
 logger = logging.getLogger(__name__)
 
 
-def http_backup_radar_sync(req: func.HttpRequest) -> func.HttpResponse:
+async def http_backup_radar_sync(req: func.HttpRequest) -> func.HttpResponse:
     """
     HTTP endpoint for manual Backup Radar sync.
     Supports syncing all tenants or a specific tenant.
     """
+    return await run_blocking_sync(_run_backup_radar_sync, req)
+
+
+def _run_backup_radar_sync(req: func.HttpRequest) -> func.HttpResponse:
     try:
         logger.info("Starting manual Backup Radar sync via HTTP request")
-        start_time = datetime.now()
 
         # Get tenant_id from query parameters if specified
         tenant_id = req.params.get("tenant_id")
         days_back = int(req.params.get("days_back", 7))
 
+        # Both branches work from the same tenant list, so load it once
+        tenants = get_tenants()
+
         if tenant_id:
             # Sync specific tenant
             logger.info(f"Syncing Backup Radar data for specific tenant: {tenant_id}")
-            tenants = get_tenants()
             result = sync_backup_radar_for_tenant(tenant_id, tenants, days_back)
 
             if result["status"] == "success":
@@ -41,7 +47,7 @@ def http_backup_radar_sync(req: func.HttpRequest) -> func.HttpResponse:
                     "duration_seconds": result["duration_seconds"],
                     "sync_timestamp": result["sync_timestamp"],
                 }
-                return create_success_response(response_data)
+                return create_success_response(response_data, tenant_id=tenant_id, operation="backup_radar_sync")
             else:
                 return create_error_response(
                     f"Backup Radar sync failed for tenant {tenant_id}: {result.get('error', 'Unknown error')}", status_code=500
@@ -49,7 +55,6 @@ def http_backup_radar_sync(req: func.HttpRequest) -> func.HttpResponse:
         else:
             # Sync all tenants
             logger.info("Syncing Backup Radar data for all tenants")
-            tenants = get_tenants()
             result = sync_backup_radar_data(tenants, days_back)
 
             if result["status"] == "success":
@@ -67,7 +72,7 @@ def http_backup_radar_sync(req: func.HttpRequest) -> func.HttpResponse:
                 if "errors" in result:
                     response_data["errors"] = result["errors"]
 
-                return create_success_response(response_data)
+                return create_success_response(response_data, tenant_id="all_tenants", operation="backup_radar_sync")
             else:
                 return create_error_response(f"Backup Radar sync failed: {result.get('error', 'Unknown error')}", status_code=500)
 
@@ -121,8 +126,6 @@ def http_backup_radar_status(req: func.HttpRequest) -> func.HttpResponse:
             """
             params = (limit,)
 
-        results = query(sql, params)
-
         # Get total counts
         total_sql = "SELECT COUNT(*) as total FROM backup_radar"
         if tenant_id:
@@ -131,7 +134,14 @@ def http_backup_radar_status(req: func.HttpRequest) -> func.HttpResponse:
         else:
             total_params = None
 
-        total_result = query(total_sql, total_params)
+        # Both reads share one connection
+        conn = get_connection()
+        try:
+            results = query(sql, params, conn=conn)
+            total_result = query(total_sql, total_params, conn=conn)
+        finally:
+            conn.close()
+
         total_backups = total_result[0]["total"] if total_result else 0
 
         response_data = {
@@ -144,7 +154,7 @@ def http_backup_radar_status(req: func.HttpRequest) -> func.HttpResponse:
         if tenant_id:
             response_data["tenant_id"] = tenant_id
 
-        return create_success_response(response_data)
+        return create_success_response(response_data, tenant_id=tenant_id or "all_tenants", operation="backup_radar_status")
 
     except Exception as e:
         error_msg = f"Failed to get Backup Radar status: {clean_error_message(str(e))}"
@@ -161,8 +171,6 @@ def http_backup_radar_health(req: func.HttpRequest) -> func.HttpResponse:
         logger.info("Running Backup Radar health check")
 
         # Test API connectivity
-        from shared.backup_radar_api import get_backup_overview
-
         try:
             overview = get_backup_overview()
             api_status = "healthy"
@@ -1,5 +1,5 @@
-from datetime import datetime
 import logging
+import time
 
 import azure.functions as func
 
@@ -20,7 +20,7 @@ def timer_backup_radar_sync(timer: func.TimerRequest) -> None:
         logger.info("The timer is past due!")
 
     logger.info("Starting scheduled Backup Radar sync for all tenants")
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     try:
         # Get all tenants
@@ -54,6 +54,5 @@ def timer_backup_radar_sync(timer: func.TimerRequest) -> None:
         error_msg = f"Backup Radar timer function failed: {clean_error_message(str(e))}"
         logger.error(error_msg)
 
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         logger.error(f"Backup Radar sync failed after {duration:.2f}s: {error_msg}")
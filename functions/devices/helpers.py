@@ -1,6 +1,7 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import logging
+import time
 
 from db.db_client import init_schema, upsert_many
 from shared.graph_beta_client import GraphBetaClient
@@ -187,12 +188,13 @@ def fetch_azure_device_registered_users(tenant_id, device_id):
         users = graph.get(f"/devices/{device_id}/registeredUsers", select=["id", "userPrincipalName"])
         return users
     except Exception as e:
-        logger.debug(f"Failed to fetch registered users for Azure device {device_id}: {str(e)}")
+        logger.debug("Failed to fetch registered users for Azure device %s: %s", device_id, e)
         return []
 
 
 def transform_intune_devices(devices, tenant_id):
     """Transform Intune devices to database records for intune_devices table"""
+    now_iso = datetime.now().isoformat()
     records = []
 
     for device in devices:
@@ -242,30 +244,24 @@ def transform_intune_devices(devices, tenant_id):
                 is_encrypted = 0
             else:
                 is_encrypted = 0  # Default to 0 if unknown
-                logger.debug(f"Device {device_name} unknown isEncrypted value: {is_encrypted_raw} (type: {type(is_encrypted_raw)})")
+                logger.debug("Device %s unknown isEncrypted value: %s (type: %s)", device_name, is_encrypted_raw, type(is_encrypted_raw))
 
             # Handle dates - ensure proper ISO format
             enrolled_date = device.get("enrolledDateTime")
             last_sign_in_date = device.get("lastSyncDateTime")  # Use last sync as proxy for activity
 
             # Debug logging for date fields
-            logger.debug(f"Device {device_name} date data: enrolled={enrolled_date}, last_sync={last_sign_in_date}")
+            logger.debug("Device %s date data: enrolled=%s, last_sync=%s", device_name, enrolled_date, last_sign_in_date)
 
             # Convert dates to proper ISO format if they exist
             if enrolled_date and not enrolled_date.endswith("Z"):
                 # Ensure proper ISO format
-                try:
-                    if "T" in enrolled_date:
-                        enrolled_date = enrolled_date + "Z" if not enrolled_date.endswith("Z") else enrolled_date
-                except Exception:
-                    enrolled_date = None
+                if "T" in enrolled_date:
+                    enrolled_date += "Z"
 
             if last_sign_in_date and not last_sign_in_date.endswith("Z"):
-                try:
-                    if "T" in last_sign_in_date:
-                        last_sign_in_date = last_sign_in_date + "Z" if not last_sign_in_date.endswith("Z") else last_sign_in_date
-                except Exception:
-                    last_sign_in_date = None
+                if "T" in last_sign_in_date:
+                    last_sign_in_date += "Z"
 
             record = {
                 "tenant_id": tenant_id,
@@ -285,8 +281,8 @@ def transform_intune_devices(devices, tenant_id):
                 "is_encrypted": is_encrypted,
                 "last_sign_in_date": last_sign_in_date,
                 "enrolled_date": enrolled_date,
-                "created_at": datetime.now().isoformat(),
-                "last_updated": datetime.now().isoformat(),
+                "created_at": now_iso,
+                "last_updated": now_iso,
                 # Store user_id for relationship creation
                 "_user_id": device.get("userId"),
             }
@@ -301,6 +297,7 @@ def transform_intune_devices(devices, tenant_id):
 
 def transform_azure_devices(devices, tenant_id):
     """Transform Azure devices to database records"""
+    now_iso = datetime.now().isoformat()
     records = []
 
     for device in devices:
@@ -361,8 +358,8 @@ def transform_azure_devices(devices, tenant_id):
                 "on_premises_sync_enabled": on_premises_sync_enabled,
                 "on_premises_last_sync_date": on_premises_last_sync_date,
                 "last_sign_in_date": last_sign_in_date,  # Moved to third-to-last position
-                "created_at": datetime.now().isoformat(),
-                "last_updated": datetime.now().isoformat(),
+                "created_at": now_iso,
+                "last_updated": now_iso,
                 # Store original device ID for fetching registered users
                 "_original_device_id": device.get("id"),
             }
@@ -377,6 +374,7 @@ def transform_azure_devices(devices, tenant_id):
 
 def create_user_device_relationships_batch(tenant_id, devices, device_source="unknown"):
     """Create user-device relationship records with concurrent processing"""
+    now_iso = datetime.now().isoformat()
     relationships = []
 
     def process_device_relationships(device):
@@ -395,12 +393,12 @@ def create_user_device_relationships_batch(tenant_id, devices, device_source="un
                             "tenant_id": tenant_id,
                             "device_id": device_id,
                             "relationship_type": "owner",
-                            "created_at": datetime.now().isoformat(),
-                            "last_updated": datetime.now().isoformat(),
+                            "created_at": now_iso,
+                            "last_updated": now_iso,
                         }
                     ]
                 else:
-                    logger.debug(f"No user_id found for Intune device {device_id}")
+                    logger.debug("No user_id found for Intune device %s", device_id)
                     return []
 
             elif device_source == "azure" or "_original_device_id" in device:
@@ -416,16 +414,16 @@ def create_user_device_relationships_batch(tenant_id, devices, device_source="un
                                 "tenant_id": tenant_id,
                                 "device_id": device_id,
                                 "relationship_type": "registered_user",
-                                "created_at": datetime.now().isoformat(),
-                                "last_updated": datetime.now().isoformat(),
+                                "created_at": now_iso,
+                                "last_updated": now_iso,
                             }
                             device_relationships.append(relationship)
                         return device_relationships
                     except Exception as e:
-                        logger.debug(f"Failed to fetch registered users for Azure device {device_id}: {str(e)}")
+                        logger.debug("Failed to fetch registered users for Azure device %s: %s", device_id, e)
                         return []
                 else:
-                    logger.debug(f"No original_device_id found for Azure device {device_id}")
+                    logger.debug("No original_device_id found for Azure device %s", device_id)
                     return []
 
         except Exception as e:
@@ -458,7 +456,7 @@ def create_user_device_relationships_batch(tenant_id, devices, device_source="un
 
 def sync_intune_devices(tenant_id, tenant_name):
     """Orchestrate Intune device synchronization with concurrent processing"""
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     logger.info(f"Starting device sync for {tenant_name} (tenant_id: {tenant_id})")
 
     # Initialize database schema
@@ -499,7 +497,7 @@ def sync_intune_devices(tenant_id, tenant_name):
                 "tenant_name": tenant_name,
                 "devices_synced": 0,
                 "relationships_synced": 0,
-                "duration_seconds": (datetime.now() - start_time).total_seconds(),
+                "duration_seconds": time.perf_counter() - start_time,
             }
 
         # Create user-device relationships with concurrent processing
@@ -531,7 +529,7 @@ def sync_intune_devices(tenant_id, tenant_name):
             logger.error(f"Failed to store devices for {tenant_name}: {str(e)}", exc_info=True)
             raise
 
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         logger.info(
             f"Completed device sync for {tenant_name}: {devices_stored} devices, {relationships_stored} relationships in {duration:.1f}s"
         )
@@ -546,7 +544,7 @@ def sync_intune_devices(tenant_id, tenant_name):
         }
 
     except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         error_msg = clean_error_message(str(e), tenant_name=tenant_name)
         logger.error(error_msg)
         logger.debug(f"Full error details for {tenant_name}: {str(e)}", exc_info=True)
@@ -562,7 +560,7 @@ def sync_intune_devices(tenant_id, tenant_name):
 
 def sync_azure_devices(tenant_id, tenant_name):
     """Orchestrate Azure device synchronization"""
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     logger.info(f"Starting Azure device sync for {tenant_name} (tenant_id: {tenant_id})")
 
     # Initialize database schema
@@ -582,7 +580,7 @@ def sync_azure_devices(tenant_id, tenant_name):
                     "tenant_name": tenant_name,
                     "devices_synced": 0,
                     "relationships_synced": 0,
-                    "duration_seconds": (datetime.now() - start_time).total_seconds(),
+                    "duration_seconds": time.perf_counter() - start_time,
                 }
 
             azure_records = transform_azure_devices(azure_devices, tenant_id)
@@ -621,7 +619,7 @@ def sync_azure_devices(tenant_id, tenant_name):
             logger.error(f"Failed to store Azure devices for {tenant_name}: {str(e)}", exc_info=True)
             raise
 
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         logger.info(
             f"Completed Azure device sync for {tenant_name}: {devices_stored} devices, {relationships_stored} relationships in {duration:.1f}s"
         )
@@ -636,7 +634,7 @@ def sync_azure_devices(tenant_id, tenant_name):
         }
 
     except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         error_msg = clean_error_message(str(e), tenant_name=tenant_name)
         logger.error(error_msg)
         logger.debug(f"Full error details for {tenant_name}: {str(e)}", exc_info=True)
@@ -648,3 +646,11 @@ def sync_azure_devices(tenant_id, tenant_name):
             "error": str(e),
             "duration_seconds": duration,
         }
+
+
+def log_device_sync_result(source, tenant, result):
+    """run_per_tenant format_result for the device syncs: log the tenant's counts and keep the sync's own result"""
+    logger.info(
+        f"✓ {source} {tenant['display_name']}: {result.get('devices_synced', 0)} devices, {result.get('relationships_synced', 0)} relationships synced"
+    )
+    return result
@@ -1,22 +1,57 @@
-from datetime import datetime
+import functools
 import logging
+import time
 
 import azure.functions as func
 
 from db.db_client import query
-from functions.devices.helpers import sync_azure_devices, sync_intune_devices
-from shared.graph_client import get_tenants
-from shared.utils import clean_error_message, create_error_response, create_success_response
+from functions.devices.helpers import log_device_sync_result, sync_azure_devices, sync_intune_devices
+from shared.graph_client import get_tenant_by_id, get_tenants
+from shared.utils import (
+    clean_error_message,
+    create_error_response,
+    create_missing_tenant_response,
+    create_success_response,
+    run_blocking_sync,
+    run_per_tenant,
+)
 
 
 logger = logging.getLogger(__name__)
 
-
-def http_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
+# intune_devices columns get_devices may return; `fields` is checked against this before it reaches the SQL
+DEVICE_FIELDS = (
+    "tenant_id",
+    "device_id",
+    "device_name",
+    "model",
+    "serial_number",
+    "operating_system",
+    "os_version",
+    "device_ownership",
+    "is_compliant",
+    "is_managed",
+    "manufacturer",
+    "total_storage_gb",
+    "free_storage_gb",
+    "compliance_state",
+    "is_encrypted",
+    "last_sign_in_date",
+    "enrolled_date",
+    "created_at",
+    "last_updated",
+)
+
+
+async def http_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP endpoint for manual device sync"""
+    return await run_blocking_sync(_run_devices_sync, req)
+
+
+def _run_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
     try:
         logger.info("Starting manual device sync via HTTP request")
-        start_time = datetime.now()
+        start_time = time.perf_counter()
 
         # Get tenant_id from query parameters if specified
         tenant_id = req.params.get("tenant_id")
@@ -24,62 +59,37 @@ def http_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
         if tenant_id:
             # Sync specific tenant
             logger.info(f"Syncing devices for specific tenant: {tenant_id}")
-            tenants = [t for t in get_tenants() if t["tenant_id"] == tenant_id]
+            tenant = get_tenant_by_id(tenant_id)
 
-            if not tenants:
-                return func.HttpResponse(f"Tenant {tenant_id} not found", status_code=404)
+            if not tenant:
+                return create_error_response(f"Tenant {tenant_id} not found", 404)
+            tenants = [tenant]
+            response_tenant_id, response_tenant_name = tenant["tenant_id"], tenant["display_name"]
         else:
             # Sync all tenants
             logger.info("Syncing devices for all tenants")
             tenants = get_tenants()
+            response_tenant_id, response_tenant_name = "multi_tenant", "all_tenants"
 
-        total_devices = 0
-        total_relationships = 0
-        results = []
-
-        for tenant in tenants:
-            tenant_id = tenant["tenant_id"]
-            tenant_name = tenant["display_name"]
-            logger.info(f"Starting device sync for {tenant_name}")
-
-            try:
-                result = sync_intune_devices(tenant_id, tenant_name)
-                results.append(result)
-
-                if result["status"] == "success":
-                    total_devices += result.get("devices_synced", 0)
-                    total_relationships += result.get("relationships_synced", 0)
-                    logger.info(
-                        f"✓ {tenant_name}: {result.get('devices_synced', 0)} devices, {result.get('relationships_synced', 0)} relationships synced"
-                    )
-                else:
-                    logger.error(f"✗ {tenant_name}: {result.get('error', 'Unknown error')}")
-
-            except Exception as e:
-                error_msg = clean_error_message(str(e), tenant_name=tenant_name)
-                logger.error(f"✗ {tenant_name}: {error_msg}")
-                results.append(
-                    {
-                        "status": "error",
-                        "tenant_id": tenant_id,
-                        "tenant_name": tenant_name,
-                        "error": str(e),
-                    }
-                )
-
-        duration = (datetime.now() - start_time).total_seconds()
+        results = run_per_tenant(tenants, sync_intune_devices, functools.partial(log_device_sync_result, "Intune"))
 
-        # Prepare response
-        successful_tenants = [r for r in results if r.get("status") == "success"]
-        failed_tenants = [r for r in results if r.get("status") != "success"]
+        total_devices = total_relationships = successful_count = 0
+        for r in results:
+            if r["status"] == "success":
+                successful_count += 1
+                total_devices += r.get("devices_synced", 0)
+                total_relationships += r.get("relationships_synced", 0)
+
+        duration = time.perf_counter() - start_time
 
+        # Prepare response
         response_data = {
             "status": "completed",
             "total_devices": total_devices,
             "total_relationships": total_relationships,
             "tenants_processed": len(tenants),
-            "successful_tenants": len(successful_tenants),
-            "failed_tenants": len(failed_tenants),
+            "successful_tenants": successful_count,
+            "failed_tenants": len(results) - successful_count,
             "duration_seconds": duration,
             "results": results,
         }
@@ -88,17 +98,18 @@ def http_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
             f"Device sync completed: {total_devices} devices, {total_relationships} relationships across {len(tenants)} tenants in {duration:.1f}s"
         )
 
-        return func.HttpResponse(func.HttpResponse.json(response_data), status_code=200, headers={"Content-Type": "application/json"})
+        return create_success_response(
+            data=response_data,
+            tenant_id=response_tenant_id,
+            tenant_name=response_tenant_name,
+            operation="devices_sync",
+            message=f"Device sync completed: {total_devices} devices, {total_relationships} relationships",
+        )
 
     except Exception as e:
         error_msg = clean_error_message(str(e), "Device sync HTTP request failed")
         logger.error(error_msg)
-
-        return func.HttpResponse(
-            func.HttpResponse.json({"status": "error", "error": str(e), "message": "Device sync failed"}),
-            status_code=500,
-            headers={"Content-Type": "application/json"},
-        )
+        return create_error_response(f"Device sync failed: {str(e)}", 500)
 
 
 def get_devices(req: func.HttpRequest) -> func.HttpResponse:
@@ -106,10 +117,17 @@ def get_devices(req: func.HttpRequest) -> func.HttpResponse:
     try:
         tenant_id = req.params.get("tenant_id")
         if not tenant_id:
-            return create_error_response("Tenant ID is required", 400)
+            return create_missing_tenant_response()
+
+        # Optional ?fields=a,b,c projects only the listed columns (device_id is always included) to slim list views
+        requested_fields = {f.strip() for f in req.params.get("fields", "").split(",")}
+        if requested_fields.intersection(DEVICE_FIELDS):
+            columns = ", ".join(f"d.{f}" for f in DEVICE_FIELDS if f in requested_fields or f == "device_id")
+        else:
+            columns = "d.*"
 
-        devices_query = """
-            SELECT d.*,
+        devices_query = f"""
+            SELECT {columns},
                    COUNT(DISTINCT ud.user_id) as user_count,
                    SUM(CASE WHEN ud.relationship_type = 'owner' THEN 1 ELSE 0 END) as owner_count
             FROM intune_devices d
@@ -133,48 +151,25 @@ def get_devices(req: func.HttpRequest) -> func.HttpResponse:
         return create_error_response(f"Failed to retrieve devices: {str(e)}", 500)
 
 
-def http_azure_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
+async def http_azure_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
     """Sync Azure devices for all tenants"""
+    return await run_blocking_sync(_run_azure_devices_sync)
+
+
+def _run_azure_devices_sync() -> func.HttpResponse:
     try:
         logger.info("Starting Azure device sync for all tenants")
-        start_time = datetime.now()
-
-        tenants = get_tenants()
-        total_devices = 0
-        total_relationships = 0
-        results = []
-
-        for tenant in tenants:
-            tenant_id = tenant["tenant_id"]
-            tenant_name = tenant["display_name"]
-            logger.info(f"Starting Azure device sync for {tenant_name}")
-
-            try:
-                result = sync_azure_devices(tenant_id, tenant_name)
-                results.append(result)
-
-                if result["status"] == "success":
-                    total_devices += result.get("devices_synced", 0)
-                    total_relationships += result.get("relationships_synced", 0)
-                    logger.info(
-                        f"✓ Azure {tenant_name}: {result.get('devices_synced', 0)} devices, {result.get('relationships_synced', 0)} relationships synced"
-                    )
-                else:
-                    logger.error(f"✗ Azure {tenant_name}: {result.get('error', 'Unknown error')}")
-
-            except Exception as e:
-                error_msg = clean_error_message(str(e), tenant_name=tenant_name)
-                logger.error(f"✗ Azure {tenant_name}: {error_msg}")
-                results.append(
-                    {
-                        "status": "error",
-                        "tenant_id": tenant_id,
-                        "tenant_name": tenant_name,
-                        "error": str(e),
-                    }
-                )
-
-        duration = (datetime.now() - start_time).total_seconds()
+        start_time = time.perf_counter()
+
+        results = run_per_tenant(get_tenants(), sync_azure_devices, functools.partial(log_device_sync_result, "Azure"))
+
+        total_devices = total_relationships = 0
+        for r in results:
+            if r["status"] == "success":
+                total_devices += r.get("devices_synced", 0)
+                total_relationships += r.get("relationships_synced", 0)
+
+        duration = time.perf_counter() - start_time
         logger.info(f"Azure device sync completed: {total_devices} devices, {total_relationships} relationships in {duration:.1f}s")
 
         return create_success_response(
@@ -184,6 +179,8 @@ def http_azure_devices_sync(req: func.HttpRequest) -> func.HttpResponse:
                 "total_relationships": total_relationships,
                 "duration_seconds": duration,
             },
+            tenant_id="multi_tenant",
+            tenant_name="all_tenants",
             operation="azure_devices_sync",
             message=f"Azure device sync completed: {total_devices} devices, {total_relationships} relationships",
         )
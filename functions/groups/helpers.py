@@ -1,6 +1,7 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import logging
+import time
 
 from db.db_client import get_connection, init_schema, query, upsert_many
 from shared.graph_beta_client import GraphBetaClient
@@ -99,6 +100,7 @@ def determine_group_type(group_types):
 
 def transform_group_data(groups, tenant_id, use_beta=True):
     """Transform group data for database storage using concurrent processing"""
+    now_iso = datetime.now().isoformat()
     try:
         logger.info(f"Transforming {len(groups)} groups for tenant {tenant_id}")
 
@@ -142,12 +144,13 @@ def transform_group_data(groups, tenant_id, use_beta=True):
                         "visibility": group.get("visibility", "Private"),
                         "member_count": member_count,
                         "owner_count": owner_count,
-                        "created_at": datetime.now().isoformat(),
-                        "last_updated": datetime.now().isoformat(),
+                        "created_at": now_iso,
+                        "last_updated": now_iso,
                     }
                     group_records.append(group_record)
 
-                    # Process each user member of this group
+                    # Process each user member of this group, indexed by user id so owners can be matched in O(1)
+                    member_records = {}
                     for member in user_members:
                         user_group_record = {
                             "user_id": member.get("id"),
@@ -157,22 +160,16 @@ def transform_group_data(groups, tenant_id, use_beta=True):
                             "group_display_name": group.get("displayName", "Unknown Group"),
                             "group_type": group_type,
                             "membership_type": "Member",
-                            "created_at": datetime.now().isoformat(),
-                            "last_updated": datetime.now().isoformat(),
+                            "created_at": now_iso,
+                            "last_updated": now_iso,
                         }
                         user_group_records.append(user_group_record)
+                        member_records.setdefault(member.get("id"), user_group_record)
 
                     # Process each user owner of this group
                     for owner in user_owners:
                         # Check if user is already in user_group_records as a member
-                        existing_record = next(
-                            (
-                                record
-                                for record in user_group_records
-                                if record["user_id"] == owner.get("id") and record["group_id"] == group.get("id")
-                            ),
-                            None,
-                        )
+                        existing_record = member_records.get(owner.get("id"))
 
                         if existing_record:
                             # Update existing record to mark as owner
@@ -187,10 +184,11 @@ def transform_group_data(groups, tenant_id, use_beta=True):
                                 "group_display_name": group.get("displayName", "Unknown Group"),
                                 "group_type": group_type,
                                 "membership_type": "Owner",
-                                "created_at": datetime.now().isoformat(),
-                                "last_updated": datetime.now().isoformat(),
+                                "created_at": now_iso,
+                                "last_updated": now_iso,
                             }
                             user_group_records.append(user_group_record)
+                            member_records[owner.get("id")] = user_group_record
 
                 except Exception as e:
                     logger.warning(f"Failed to process group {group.get('id', 'unknown')}: {str(e)}")
@@ -215,7 +213,7 @@ def sync_groups(tenant_id, tenant_name):
 
     try:
         logger.info(f"Starting group sync for {tenant_name}")
-        start_time = datetime.now()
+        start_time = time.perf_counter()
 
         # Detect tenant capabilities
         is_premium = detect_tenant_capabilities(tenant_id)
@@ -231,7 +229,7 @@ def sync_groups(tenant_id, tenant_name):
                 "tenant_name": tenant_name,
                 "groups_synced": 0,
                 "user_groups_synced": 0,
-                "duration_seconds": (datetime.now() - start_time).total_seconds(),
+                "duration_seconds": time.perf_counter() - start_time,
             }
 
         # Transform and get group data using concurrent processing
@@ -255,11 +253,18 @@ def sync_groups(tenant_id, tenant_name):
             upsert_many("user_groupsV2", user_group_records)
             logger.info(f"Stored {len(user_group_records)} user group assignments")
 
-        # Count totals after sync
-        total_groups = query("SELECT COUNT(*) as total FROM groups WHERE tenant_id = ?", (tenant_id,))[0]["total"]
-        total_memberships = query("SELECT COUNT(*) as total FROM user_groupsV2 WHERE tenant_id = ?", (tenant_id,))[0]["total"]
-
-        duration = (datetime.now() - start_time).total_seconds()
+        # Count totals after sync in one round trip
+        totals = query(
+            """
+            SELECT (SELECT COUNT(*) FROM groups WHERE tenant_id = ?) as total_groups,
+                   (SELECT COUNT(*) FROM user_groupsV2 WHERE tenant_id = ?) as total_memberships
+            """,
+            (tenant_id, tenant_id),
+        )[0]
+        total_groups = totals["total_groups"]
+        total_memberships = totals["total_memberships"]
+
+        duration = time.perf_counter() - start_time
         logger.info(f"Group sync completed for {tenant_name} in {duration:.2f} seconds")
 
         return {
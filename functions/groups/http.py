@@ -5,53 +5,49 @@ import azure.functions as func
 from db.db_client import query
 from shared.error_reporting import categorize_sync_errors
 from shared.graph_client import get_tenants
-from shared.utils import clean_error_message, create_error_response, create_success_response
+from shared.utils import (
+    create_error_response,
+    create_missing_tenant_response,
+    create_success_response,
+    run_blocking_sync,
+    run_per_tenant,
+)
 
 from .helpers import sync_groups
 
 
 # HTTP FUNCTIONS
-def http_group_sync(req: func.HttpRequest) -> func.HttpResponse:
+async def http_group_sync(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP trigger for manual group sync"""
+    return await run_blocking_sync(_run_group_sync)
+
+
+def _group_sync_result(tenant, result):
+    groups_synced = result["groups_synced"]
+    user_groups_synced = result.get("user_groups_synced", 0)
+    logging.info(f" {tenant['display_name']}: {groups_synced} groups, {user_groups_synced} user memberships synced")
+    return {
+        "status": "completed",
+        "tenant_id": tenant["tenant_id"],
+        "groups_synced": groups_synced,
+        "user_groups_synced": user_groups_synced,
+    }
+
+
+def _run_group_sync() -> func.HttpResponse:
     try:
         logging.info("Starting manual group sync")
         tenants = get_tenants()
-        results = []
-
-        for tenant in tenants:
-            try:
-                result = sync_groups(tenant["tenant_id"], tenant["display_name"])
-                if result["status"] == "success":
-                    logging.info(
-                        f" {tenant['display_name']}: {result['groups_synced']} groups, {result.get('user_groups_synced', 0)} user memberships synced"
-                    )
-                    results.append(
-                        {
-                            "status": "completed",
-                            "tenant_id": tenant["tenant_id"],
-                            "groups_synced": result["groups_synced"],
-                            "user_groups_synced": result.get("user_groups_synced", 0),
-                        }
-                    )
-                else:
-                    logging.error(f" {tenant['display_name']}: {result['error']}")
-                    results.append(
-                        {
-                            "status": "error",
-                            "tenant_id": tenant["tenant_id"],
-                            "error": result.get("error", "Unknown error"),
-                        }
-                    )
-            except Exception as e:
-                logging.error(clean_error_message(str(e), tenant["display_name"]))
-                results.append({"status": "error", "tenant_id": tenant["tenant_id"], "error": str(e)})
-
-        failed_count = len([r for r in results if r["status"] == "error"])
-        if failed_count > 0:
+        results = run_per_tenant(tenants, sync_groups, _group_sync_result)
+
+        if any(r["status"] == "error" for r in results):
             categorize_sync_errors(results, "Groups HTTP")
 
-        total_groups = sum(r.get("groups_synced", 0) for r in results if r["status"] == "completed")
-        total_user_groups = sum(r.get("user_groups_synced", 0) for r in results if r["status"] == "completed")
+        total_groups = total_user_groups = 0
+        for r in results:
+            if r["status"] == "completed":
+                total_groups += r["groups_synced"]
+                total_user_groups += r["user_groups_synced"]
 
         return create_success_response(
             data={"total_groups": total_groups, "total_user_groups": total_user_groups, "tenants_processed": len(tenants)},
@@ -71,7 +67,7 @@ def get_groups(req: func.HttpRequest) -> func.HttpResponse:
     try:
         tenant_id = req.params.get("tenant_id")
         if not tenant_id:
-            return create_error_response("Tenant ID is required", 400)
+            return create_missing_tenant_response()
 
         groups_query = """
             SELECT g.*,
@@ -1,8 +1,10 @@
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import csv
 from datetime import UTC, datetime, timedelta
 import logging
 import os
+import time
 
 from db.db_client import execute_query, get_connection, init_schema, query, upsert_many
 from shared.graph_beta_client import GraphBetaClient
@@ -152,6 +154,63 @@ def fetch_user_license_details_batch(tenant_id, user, use_beta=True):
         return user_id, []
 
 
+def fetch_users_license_details(tenant_id, user_ids, use_beta=True):
+    """Fetch license details for many users, 20 users per $batch round-trip"""
+    results = {}
+    if not user_ids:
+        return results
+
+    graph = GraphBetaClient(tenant_id) if use_beta else GraphClient(tenant_id)
+    graph.get_token()  # acquire once before the workers share the client
+
+    def fetch_chunk_details(chunk):
+        batch_requests = [
+            {"id": str(i), "method": "GET", "url": f"/users/{user_id}/licenseDetails?$select=skuId,skuPartNumber,servicePlans"}
+            for i, user_id in enumerate(chunk)
+        ]
+        chunk_results = {}
+        failed_statuses = Counter()
+
+        for response in graph.batch(batch_requests):
+            user_id = chunk[int(response["id"])]
+            status = response.get("status")
+
+            if status == 200:
+                chunk_results[user_id] = response.get("body", {}).get("value", [])
+            elif status in (429, 500, 502, 503, 504):
+                # Throttled or transient - retry this user on its own with the client's backoff
+                chunk_results[user_id] = fetch_user_license_details_batch(tenant_id, {"id": user_id}, use_beta)[1]
+            else:
+                failed_statuses[status] += 1
+                chunk_results[user_id] = []
+
+        return chunk_results, failed_statuses
+
+    chunks = [user_ids[i : i + 20] for i in range(0, len(user_ids), 20)]
+    failed_statuses = Counter()
+
+    with ThreadPoolExecutor(max_workers=min(5, len(chunks))) as executor:
+        future_to_chunk = {executor.submit(fetch_chunk_details, chunk): chunk for chunk in chunks}
+
+        for future in as_completed(future_to_chunk):
+            try:
+                chunk_results, chunk_failed_statuses = future.result()
+                results.update(chunk_results)
+                failed_statuses.update(chunk_failed_statuses)
+            except Exception as e:
+                chunk = future_to_chunk[future]
+                logger.warning(f"Failed to fetch license details for {len(chunk)} users: {str(e)}")
+                for user_id in chunk:
+                    results.setdefault(user_id, [])
+
+    # One summary line per tenant instead of a warning per failed user
+    if failed_statuses:
+        status_summary = ", ".join(f"status {status} x{count}" for status, count in failed_statuses.most_common())
+        logger.warning(f"Failed to fetch license details for {sum(failed_statuses.values())} users in tenant {tenant_id}: {status_summary}")
+
+    return results
+
+
 def fetch_tenant_subscriptions(tenant_id, use_beta=True):
     """Fetch tenant-level subscription information"""
     try:
@@ -184,6 +243,7 @@ def fetch_tenant_subscriptions(tenant_id, use_beta=True):
 
 def sync_licenses_v2(tenant_id, tenant_name):
     """Sync both tenant licenses and user license assignments"""
+    now_iso = datetime.now().isoformat()
     init_schema()
 
     try:
@@ -215,8 +275,8 @@ def sync_licenses_v2(tenant_id, tenant_name):
                     "warning_count": prepaid_units.get("warning", 0),
                     "suspended_count": prepaid_units.get("suspended", 0),
                     "monthly_cost": estimate_license_cost(sku_part_number),
-                    "created_at": datetime.now().isoformat(),
-                    "last_updated": datetime.now().isoformat(),
+                    "created_at": now_iso,
+                    "last_updated": now_iso,
                 }
                 license_records.append(license_data)
                 license_lookup[lic.get("skuId")] = license_data
@@ -238,30 +298,15 @@ def sync_licenses_v2(tenant_id, tenant_name):
         if users_with_licenses_list:
             logger.info(f"Starting concurrent processing of {users_with_licenses} users with licenses...")
 
-            # Use ThreadPoolExecutor to fetch license details concurrently
-            with ThreadPoolExecutor(max_workers=15) as executor:
-                future_to_user = {
-                    executor.submit(fetch_user_license_details_batch, tenant_id, user, is_premium): user
-                    for user in users_with_licenses_list
-                }
-
-                processed_count = 0
-                license_details_lookup = {}
-
-                for future in as_completed(future_to_user):
-                    user = future_to_user[future]
-                    try:
-                        user_id, detailed_licenses = future.result()
-                        license_details_lookup[user_id] = {lic["skuId"]: lic for lic in detailed_licenses}
-                    except Exception as e:
-                        logger.warning(f"Failed to process license details for user {user.get('id', 'unknown')}: {str(e)}")
-                        continue
-
-                    processed_count += 1
-                    if processed_count % 50 == 0 or processed_count == users_with_licenses:
-                        logger.info(f"Processed {processed_count}/{users_with_licenses} users with licenses...")
+            # Fetch license details through $batch, 20 users per request
+            details_by_user = fetch_users_license_details(tenant_id, [user["id"] for user in users_with_licenses_list], is_premium)
+            license_details_lookup = {
+                user_id: {lic["skuId"]: lic for lic in detailed_licenses} for user_id, detailed_licenses in details_by_user.items()
+            }
+            logger.info(f"Fetched license details for {len(license_details_lookup)}/{users_with_licenses} users with licenses")
 
-            # Now process all users with their license details
+            # Now process all users with their license details; the 90-day activity cutoff is the same for all of them
+            cutoff_date = datetime.now(UTC) - timedelta(days=90)
             for user in users_with_licenses_list:
                 user_id = user.get("id")
                 upn = user.get("userPrincipalName")
@@ -292,10 +337,9 @@ def sync_licenses_v2(tenant_id, tenant_name):
                             if last_sign_in:
                                 try:
                                     last_signin_date = datetime.fromisoformat(last_sign_in)
-                                    cutoff_date = datetime.now(UTC) - timedelta(days=90)
                                     if last_signin_date < cutoff_date:
                                         is_license_active = 0
-                                except Exception:
+                                except (ValueError, TypeError):
                                     pass
                             else:
                                 is_license_active = 0
@@ -310,8 +354,8 @@ def sync_licenses_v2(tenant_id, tenant_name):
                         "license_display_name": get_sku_display_name(sku_part_number, sku_id),
                         "license_partnumber": sku_part_number,
                         "monthly_cost": estimate_license_cost(sku_part_number),
-                        "created_at": datetime.now().isoformat(),
-                        "last_updated": datetime.now().isoformat(),
+                        "created_at": now_iso,
+                        "last_updated": now_iso,
                     }
                     user_license_records.append(user_license_record)
 
@@ -349,7 +393,7 @@ def sync_licenses_v2(tenant_id, tenant_name):
                         """UPDATE user_licensesV2
                            SET is_active = 0, unassigned_date = ?, last_updated = ?
                            WHERE user_id = ? AND tenant_id = ? AND is_active = 1""",
-                        (datetime.now().isoformat(), datetime.now().isoformat(), user_status["user_id"], tenant_id),
+                        (now_iso, now_iso, user_status["user_id"], tenant_id),
                     )
 
         return {
@@ -369,11 +413,12 @@ def sync_licenses_v2(tenant_id, tenant_name):
 
 def sync_subscriptions(tenant_id, tenant_name):
     """Sync tenant subscriptions with optimized processing"""
+    now_iso = datetime.now().isoformat()
     init_schema()
 
     try:
         logger.info(f"Starting subscription sync for {tenant_name}")
-        start_time = datetime.now()
+        start_time = time.perf_counter()
 
         # Detect tenant capabilities
         is_premium = detect_tenant_capabilities(tenant_id)
@@ -388,7 +433,7 @@ def sync_subscriptions(tenant_id, tenant_name):
                 "tenant_id": tenant_id,
                 "tenant_name": tenant_name,
                 "subscriptions_synced": 0,
-                "duration_seconds": (datetime.now() - start_time).total_seconds(),
+                "duration_seconds": time.perf_counter() - start_time,
             }
 
         logger.info(f"Processing {len(tenant_subscriptions)} subscriptions...")
@@ -410,8 +455,8 @@ def sync_subscriptions(tenant_id, tenant_name):
                     "is_trial": 1 if subscription.get("isTrial", False) else 0,
                     "total_licenses": subscription.get("totalLicenses", 0),
                     "next_lifecycle_date_time": subscription.get("nextLifecycleDateTime"),
-                    "created_at": datetime.now().isoformat(),
-                    "last_updated": datetime.now().isoformat(),
+                    "created_at": now_iso,
+                    "last_updated": now_iso,
                 }
                 subscription_records.append(subscription_data)
                 processed_count += 1
@@ -439,16 +484,25 @@ def sync_subscriptions(tenant_id, tenant_name):
         # Count total subscriptions after sync
         total_subscriptions = query("SELECT COUNT(*) as total FROM subscriptions WHERE tenant_id = ?", (tenant_id,))[0]["total"]
 
-        duration = (datetime.now() - start_time).total_seconds()
-
-        # Log final summary
-        logger.info(f"=== SUBSCRIPTION SYNC SUMMARY FOR {tenant_name} ===")
-        logger.info(f"Subscriptions processed: {processed_count}")
-        logger.info(f"Subscriptions failed: {failed_count}")
-        logger.info(f"Subscriptions stored: {len(subscription_records)}")
-        logger.info(f"Total subscriptions in database: {total_subscriptions}")
-        logger.info(f"Duration: {duration:.2f} seconds")
-        logger.info("=" * 50)
+        duration = time.perf_counter() - start_time
+
+        # Log final summary as one record; the fields also go out as custom dimensions
+        logger.info(
+            "Subscription sync summary for %s: %d processed, %d failed, %d stored, %d in database, %.2fs",
+            tenant_name,
+            processed_count,
+            failed_count,
+            len(subscription_records),
+            total_subscriptions,
+            duration,
+            extra={
+                "subscriptions_processed": processed_count,
+                "subscriptions_failed": failed_count,
+                "subscriptions_stored": len(subscription_records),
+                "subscriptions_total": total_subscriptions,
+                "duration_seconds": round(duration, 2),
+            },
+        )
 
         return {
             "status": "success",
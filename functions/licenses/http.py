@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 import azure.functions as func
@@ -6,7 +7,13 @@ from db.db_client import query
 from shared.error_reporting import categorize_sync_errors
 from shared.graph_beta_client import GraphBetaClient
 from shared.graph_client import get_tenants
-from shared.utils import clean_error_message, create_error_response, create_success_response
+from shared.utils import (
+    create_error_response,
+    create_missing_tenant_response,
+    create_success_response,
+    run_blocking_sync,
+    run_per_tenant,
+)
 
 from .helpers import sync_licenses_v2, sync_subscriptions
 
@@ -16,7 +23,7 @@ def get_licenses(req: func.HttpRequest) -> func.HttpResponse:
     try:
         tenant_id = req.params.get("tenant_id")
         if not tenant_id:
-            return create_error_response("Tenant ID is required", 400)
+            return create_missing_tenant_response()
 
         licenses_query = """
             SELECT l.*,
@@ -48,7 +55,7 @@ def get_subscriptions(req: func.HttpRequest) -> func.HttpResponse:
     try:
         tenant_id = req.params.get("tenant_id")
         if not tenant_id:
-            return create_error_response("Tenant ID is required", 400)
+            return create_missing_tenant_response()
 
         subscriptions_query = """
             SELECT * FROM subscriptions
@@ -70,58 +77,20 @@ def get_subscriptions(req: func.HttpRequest) -> func.HttpResponse:
         return create_error_response(f"Failed to retrieve subscriptions: {str(e)}", 500)
 
 
-def get_tenant_subscription_by_id(req: func.HttpRequest) -> func.HttpResponse:
+async def get_tenant_subscription_by_id(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP GET endpoint for single tenant subscription data"""
     # Returns structured response with subscription optimization actions
 
     try:
         # extract & validate tenant id
         tenant_id = req.params.get("tenant_id")
-        logging.info(f"Subscriptions API request for tenant: {tenant_id}")
+        logging.info("Subscriptions API request for tenant: %s", tenant_id)
 
         if not tenant_id:
-            return create_error_response(error_message="tenant_id parameter is required", status_code=400)
+            return create_missing_tenant_response()
 
-        # single Graph API call - much faster
-        graph_client = GraphBetaClient(tenant_id)
-        tenant_details = graph_client.get_tenant_details(tenant_id)
-
-        # handle fact get_tenant_details returns a list
-        if tenant_details and len(tenant_details) > 0:
-            tenant_name = tenant_details[0].get("displayName", tenant_id)
-        else:
-            tenant_name = tenant_id
-
-        logging.info(f"Processing subscription data for tenant: {tenant_name}")
-
-        # grab subscription data
-        # basic subscription counts
-        total_subscriptions_query = "SELECT COUNT(*) as count FROM subscriptions WHERE tenant_id = ?"
-        total_subscriptions_result = query(total_subscriptions_query, (tenant_id,))
-
-        active_subscriptions_query = "SELECT COUNT(*) as count FROM subscriptions WHERE tenant_id = ? AND is_active = 1"
-        active_subscriptions_result = query(active_subscriptions_query, (tenant_id,))
-
-        # trial subscriptions count
-        trial_subscriptions_query = "SELECT COUNT(*) as count FROM subscriptions WHERE tenant_id = ? AND is_trial = 1"
-        trial_subscriptions_result = query(trial_subscriptions_query, (tenant_id,))
-
-        # expiring soon subscriptions (within 30 days)
-        expiring_soon_query = """
-        SELECT COUNT(*) as count FROM subscriptions
-        WHERE tenant_id = ? AND next_lifecycle_date_time IS NOT NULL
-        AND date(next_lifecycle_date_time) <= date('now', '+30 days')
-        """
-        expiring_soon_result = query(expiring_soon_query, (tenant_id,))
-
-        # calculate metrics
-        total_subscriptions = total_subscriptions_result[0]["count"] if total_subscriptions_result else 0
-        active_subscriptions = active_subscriptions_result[0]["count"] if active_subscriptions_result else 0
-        trial_subscriptions = trial_subscriptions_result[0]["count"] if trial_subscriptions_result else 0
-        expiring_soon = expiring_soon_result[0]["count"] if expiring_soon_result else 0
-        inactive_subscriptions = total_subscriptions - active_subscriptions
-
-        # fetch actual subscription data for the data field
+        # grab subscription data in one query; the expiring-soon flag (within 30 days) is computed per row
+        # so the metrics below can be counted while the rows are transformed
         subscriptions_query = """
             SELECT
                 subscription_id,
@@ -133,24 +102,49 @@ def get_tenant_subscription_by_id(req: func.HttpRequest) -> func.HttpResponse:
                 total_licenses,
                 next_lifecycle_date_time,
                 created_at,
-                last_updated
+                last_updated,
+                CASE WHEN next_lifecycle_date_time IS NOT NULL
+                      AND date(next_lifecycle_date_time) <= date('now', '+30 days') THEN 1 ELSE 0 END as expiring_soon
             FROM subscriptions
             WHERE tenant_id = ?
             ORDER BY sku_part_number
         """
-        subscriptions_result = query(subscriptions_query, (tenant_id,))
 
-        # transform subscription data for frontend consumption
+        # the Graph tenant lookup and the database read are independent, so run them side by side
+        graph_client = GraphBetaClient(tenant_id)
+        tenant_details, subscriptions_result = await asyncio.gather(
+            asyncio.to_thread(graph_client.get_tenant_details, tenant_id),
+            asyncio.to_thread(query, subscriptions_query, (tenant_id,)),
+        )
+
+        # handle fact get_tenant_details returns a list
+        if tenant_details and len(tenant_details) > 0:
+            tenant_name = tenant_details[0].get("displayName", tenant_id)
+        else:
+            tenant_name = tenant_id
+
+        logging.info("Processing subscription data for tenant: %s", tenant_name)
+
+        # transform subscription data for frontend consumption and calculate metrics
         subscriptions_data = []
+        active_subscriptions = 0
+        trial_subscriptions = 0
+        expiring_soon = 0
         for subscription in subscriptions_result:
+            is_active = bool(subscription["is_active"])
+            is_trial = bool(subscription["is_trial"])
+            active_subscriptions += is_active
+            trial_subscriptions += is_trial
+            expiring_soon += subscription["expiring_soon"]
+
             subscriptions_data.append(
                 {
                     "subscription_id": subscription["subscription_id"],
                     "commerce_subscription_id": subscription["commerce_subscription_id"],
                     "sku_id": subscription["sku_id"],
                     "sku_part_number": subscription["sku_part_number"],
-                    "is_active": bool(subscription["is_active"]),
-                    "is_trial": bool(subscription["is_trial"]),
+                    "is_active": is_active,
+                    "is_trial": is_trial,
                     "total_licenses": subscription["total_licenses"],
                     "next_lifecycle_date_time": subscription["next_lifecycle_date_time"],
                     "created_at": subscription["created_at"],
@@ -158,6 +152,9 @@ def get_tenant_subscription_by_id(req: func.HttpRequest) -> func.HttpResponse:
                 }
             )
 
+        total_subscriptions = len(subscriptions_data)
+        inactive_subscriptions = total_subscriptions - active_subscriptions
+
         # generate subscription optimization actions
         actions = []
 
@@ -227,47 +224,36 @@ def get_tenant_subscription_by_id(req: func.HttpRequest) -> func.HttpResponse:
 
 
 # HTTP FUNCTIONS
-def http_licenses_sync(req: func.HttpRequest) -> func.HttpResponse:
+async def http_licenses_sync(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP trigger for manual license sync"""
+    return await run_blocking_sync(_run_license_sync)
+
+
+def _license_sync_result(tenant, result):
+    licenses_synced = result["licenses_synced"]
+    user_licenses_replaced = result.get("user_licenses_replaced", 0)
+    logging.info(f" {tenant['display_name']}: {licenses_synced} licenses, {user_licenses_replaced} user assignments replaced")
+    return {
+        "status": "completed",
+        "tenant_id": tenant["tenant_id"],
+        "licenses_synced": licenses_synced,
+        "user_licenses_synced": user_licenses_replaced,
+    }
+
+
+def _run_license_sync() -> func.HttpResponse:
     try:
         logging.info("Starting manual license sync")
         tenants = get_tenants()
-        total_licenses = 0
-        total_assignments = 0
-        results = []
-
-        for tenant in tenants:
-            try:
-                result = sync_licenses_v2(tenant["tenant_id"], tenant["display_name"])
-                if result["status"] == "success":
-                    logging.info(
-                        f" {tenant['display_name']}: {result['licenses_synced']} licenses, {result.get('user_licenses_replaced', 0)} user assignments replaced"
-                    )
-                    total_licenses += result["licenses_synced"]
-                    total_assignments += result["user_licenses_replaced"]
-                    results.append(
-                        {
-                            "status": "completed",
-                            "tenant_id": tenant["tenant_id"],
-                            "licenses_synced": result["licenses_synced"],
-                            "user_licenses_synced": result["user_licenses_replaced"],
-                        }
-                    )
-                else:
-                    logging.error(f" {tenant['display_name']}: {result['error']}")
-                    results.append(
-                        {
-                            "status": "error",
-                            "tenant_id": tenant["tenant_id"],
-                            "error": result.get("error", "Unknown error"),
-                        }
-                    )
-            except Exception as e:
-                logging.error(clean_error_message(str(e), tenant["display_name"]))
-                results.append({"status": "error", "tenant_id": tenant["tenant_id"], "error": str(e)})
-
-        failed_count = len([r for r in results if r["status"] == "error"])
-        if failed_count > 0:
+        results = run_per_tenant(tenants, sync_licenses_v2, _license_sync_result)
+
+        total_licenses = total_assignments = 0
+        for r in results:
+            if r["status"] == "completed":
+                total_licenses += r["licenses_synced"]
+                total_assignments += r["user_licenses_synced"]
+
+        if any(r["status"] == "error" for r in results):
             categorize_sync_errors(results, "License HTTP")
 
         return create_success_response(
@@ -283,43 +269,26 @@ def http_licenses_sync(req: func.HttpRequest) -> func.HttpResponse:
         return create_error_response(error_message=error_msg, status_code=500)
 
 
-def http_subscription_sync(req: func.HttpRequest) -> func.HttpResponse:
+async def http_subscription_sync(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP trigger for manual subscription sync"""
+    return await run_blocking_sync(_run_subscription_sync)
+
+
+def _subscription_sync_result(tenant, result):
+    logging.info(f" {tenant['display_name']}: {result['subscriptions_synced']} subscriptions synced")
+    return {"status": "completed", "tenant_id": tenant["tenant_id"], "subscriptions_synced": result["subscriptions_synced"]}
+
+
+def _run_subscription_sync() -> func.HttpResponse:
     try:
         logging.info("Starting manual subscription sync")
         tenants = get_tenants()
-        results = []
-
-        for tenant in tenants:
-            try:
-                result = sync_subscriptions(tenant["tenant_id"], tenant["display_name"])
-                if result["status"] == "success":
-                    logging.info(f" {tenant['display_name']}: {result['subscriptions_synced']} subscriptions synced")
-                    results.append(
-                        {
-                            "status": "completed",
-                            "tenant_id": tenant["tenant_id"],
-                            "subscriptions_synced": result["subscriptions_synced"],
-                        }
-                    )
-                else:
-                    logging.error(f" {tenant['display_name']}: {result['error']}")
-                    results.append(
-                        {
-                            "status": "error",
-                            "tenant_id": tenant["tenant_id"],
-                            "error": result.get("error", "Unknown error"),
-                        }
-                    )
-            except Exception as e:
-                logging.error(clean_error_message(str(e), tenant["display_name"]))
-                results.append({"status": "error", "tenant_id": tenant["tenant_id"], "error": str(e)})
-
-        failed_count = len([r for r in results if r["status"] == "error"])
-        if failed_count > 0:
+        results = run_per_tenant(tenants, sync_subscriptions, _subscription_sync_result)
+
+        if any(r["status"] == "error" for r in results):
             categorize_sync_errors(results, "Subscriptions HTTP")
 
-        total_subscriptions = sum(r.get("subscriptions_synced", 0) for r in results if r["status"] == "completed")
+        total_subscriptions = sum(r["subscriptions_synced"] for r in results if r["status"] == "completed")
 
         return create_success_response(
             data={"total_subscriptions": total_subscriptions, "tenants_processed": len(tenants)},
@@ -1,22 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import json
 import logging
 
 import azure.functions as func
+import orjson
 
 from db.db_client import query
-from functions.users.helpers import calculate_license_optimization, calculate_mfa_compliance
+from functions.users.helpers import calculate_license_optimization_for_tenants
 from shared.error_reporting import aggregate_recent_sync_errors
 from shared.graph_client import get_tenants
 from shared.utils import create_error_response
 
 
-def generate_user_report(timer: func.TimerRequest) -> None:
-    """Generate daily JSON report"""
+# Each run writes one JSON document; {DateTime} is resolved by the host when the binding fires
+REPORT_BLOB_PATH = "reports/user-report-{DateTime}.json"
+
+
+def build_tenant_summary(tenant, counts, license_result):
+    """Combine a tenant's user metrics with its license analysis and flag any warnings"""
+    tenant_id = tenant["tenant_id"]
+
+    # Calculate metrics
+    total_users = counts.get("total", 0)
+    active_users = counts.get("active") or 0
+    inactive_users = total_users - active_users
+    mfa_enabled = counts.get("mfa_enabled") or 0
+    admin_non_compliant = counts.get("admin_non_compliant") or 0
+    mfa_compliance = round(mfa_enabled / active_users * 100, 1) if active_users > 0 else 0
+
+    # Generate warnings
+    warnings = []
+    monthly_savings = license_result.get("estimated_monthly_savings", 0)
+    underutilized_count = license_result.get("underutilized_licenses", 0)
+
+    if admin_non_compliant > 0:
+        warnings.append(f"CRITICAL: {admin_non_compliant} admin users without MFA - HIGH SECURITY RISK")
+
+    if mfa_compliance < 50:
+        warnings.append(f"WARNING: Low MFA compliance ({mfa_compliance}%) - Security risk")
+
+    if monthly_savings > 100:
+        warnings.append(f"COST OPPORTUNITY: ${monthly_savings}/month potential savings from {underutilized_count} unused licenses")
+
+    inactive_percentage = round((inactive_users / total_users * 100), 1) if total_users > 0 else 0
+    if inactive_percentage > 25:
+        warnings.append(f"WARNING: High inactive user rate ({inactive_percentage}%) may indicate cleanup needed")
+
+    return {
+        "tenant_name": tenant["display_name"],
+        "tenant_id": tenant_id,
+        "total_users": total_users,
+        "active_users": active_users,
+        "inactive_percentage": inactive_percentage,
+        "mfa_compliance_rate": mfa_compliance,
+        "mfa_enabled_users": mfa_enabled,
+        "admin_non_compliant": admin_non_compliant,
+        "estimated_monthly_savings": monthly_savings,
+        "underutilized_licenses": underutilized_count,
+        "warnings": warnings,
+    }
+
+
+def generate_user_report(timer: func.TimerRequest, outblob: func.Out[str]) -> None:
+    """Generate daily JSON report and write it to the reports blob container"""
     if timer and timer.past_due:
         logging.warning("User report timer is past due!")
 
     all_tenants = get_tenants()
+    all_tenants_by_id = {t["tenant_id"]: t for t in all_tenants}
     total_tenants = len(all_tenants)
 
     logging.info(f"Starting report generation for {total_tenants} tenants")
@@ -33,87 +84,55 @@ def generate_user_report(timer: func.TimerRequest) -> None:
 
         logging.info(f"Processing {len(successful_tenants_info)} successful tenants (excluding {failed_count} failed syncs)")
 
-        # Process successful tenants
-        tenant_summaries = []
-
-        for tenant_info in successful_tenants_info:
-            tenant = next(
-                (t for t in all_tenants if t["tenant_id"] == tenant_info["tenant_id"]),
-                None,
-            )
-            if not tenant:
-                continue
-
+        if not successful_tenants_info:
+            logging.info("No successful tenants; skipping detailed report")
+            report_json = orjson.dumps({"failed_tenants": failed_count, "recent_sync_errors": recent_sync_errors}).decode()
+            logging.info(report_json)
+            outblob.set(report_json)
+            return
+
+        # User/MFA metrics and license analysis come from independent grouped queries, so run them side by side
+        tenant_ids = [t["tenant_id"] for t in successful_tenants_info]
+        placeholders = ",".join("?" * len(tenant_ids))
+        counts_sql = f"""
+            SELECT tenant_id,
+                   COUNT(*) as total,
+                   SUM(CASE WHEN account_enabled = 1 THEN 1 ELSE 0 END) as active,
+                   SUM(CASE WHEN account_enabled = 1 AND is_mfa_compliant THEN 1 ELSE 0 END) as mfa_enabled,
+                   SUM(CASE WHEN account_enabled = 1 AND NOT COALESCE(is_mfa_compliant, 0) AND is_global_admin THEN 1 ELSE 0 END)
+                       as admin_non_compliant
+            FROM usersV2
+            WHERE tenant_id IN ({placeholders})
+            GROUP BY tenant_id
+            """
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            counts_future = executor.submit(query, counts_sql, tenant_ids)
+            license_future = executor.submit(calculate_license_optimization_for_tenants, tenant_ids)
+
+            user_counts = {row["tenant_id"]: row for row in counts_future.result()}
+            license_results = license_future.result()
+
+        # Build tenant summaries and log each one as soon as it is ready; the blob gets all of them
+        tenant_reports = []
+        log_summaries = logging.getLogger().isEnabledFor(logging.INFO)
+        tenants_to_report = [all_tenants_by_id[tid] for tid in tenant_ids if tid in all_tenants_by_id]
+
+        for tenant in tenants_to_report:
+            tenant_id = tenant["tenant_id"]
+            tenant_name = tenant["display_name"]
             try:
-                tenant_id = tenant["tenant_id"]
-                tenant_name = tenant["name"]
-
-                # Get basic metrics
-                total_users_result = query(
-                    "SELECT COUNT(*) as count FROM usersV2 WHERE tenant_id = ?",
-                    (tenant_id,),
-                )
-                active_users_result = query(
-                    "SELECT COUNT(*) as count FROM usersV2 WHERE tenant_id = ? AND account_enabled = 1",
-                    (tenant_id,),
-                )
-
-                # Get analysis results
-                mfa_result = calculate_mfa_compliance(tenant_id)
-                license_result = calculate_license_optimization(tenant_id)
-
-                # Calculate metrics
-                total_users = total_users_result[0]["count"] if total_users_result else 0
-                active_users = active_users_result[0]["count"] if active_users_result else 0
-                inactive_users = total_users - active_users
-
-                # Generate warnings
-                warnings = []
-                mfa_compliance = mfa_result.get("compliance_rate", 0)
-                admin_non_compliant = mfa_result.get("admin_non_compliant", 0)
-                monthly_savings = license_result.get("estimated_monthly_savings", 0)
-                underutilized_count = license_result.get("underutilized_licenses", 0)
-
-                if admin_non_compliant > 0:
-                    warnings.append(f"CRITICAL: {admin_non_compliant} admin users without MFA - HIGH SECURITY RISK")
-
-                if mfa_compliance < 50:
-                    warnings.append(f"WARNING: Low MFA compliance ({mfa_compliance}%) - Security risk")
-
-                if monthly_savings > 100:
-                    warnings.append(
-                        f"COST OPPORTUNITY: ${monthly_savings}/month potential savings from {underutilized_count} unused licenses"
-                    )
-
-                inactive_percentage = round((inactive_users / total_users * 100), 1) if total_users > 0 else 0
-                if inactive_percentage > 25:
-                    warnings.append(f"WARNING: High inactive user rate ({inactive_percentage}%) may indicate cleanup needed")
-
-                # Build tenant summary
-                tenant_summary = {
-                    "tenant_name": tenant_name,
-                    "tenant_id": tenant_id,
-                    "total_users": total_users,
-                    "active_users": active_users,
-                    "inactive_percentage": inactive_percentage,
-                    "mfa_compliance_rate": mfa_compliance,
-                    "mfa_enabled_users": mfa_result.get("mfa_enabled", 0),
-                    "admin_non_compliant": admin_non_compliant,
-                    "estimated_monthly_savings": monthly_savings,
-                    "underutilized_licenses": underutilized_count,
-                    "warnings": warnings,
-                }
-
-                tenant_summaries.append(tenant_summary)
-
-                # Log individual tenant summary
-                logging.info(f"Report for {tenant_name}:")
-                logging.info(json.dumps(tenant_summary, indent=2))
+                tenant_summary = build_tenant_summary(tenant, user_counts.get(tenant_id, {}), license_results[tenant_id])
+                tenant_reports.append(tenant_summary)
+
+                # Skip serializing the summary when INFO records would be dropped anyway
+                if log_summaries:
+                    logging.info(f"Report for {tenant_name}: {orjson.dumps(tenant_summary).decode()}")
 
             except Exception as e:
                 logging.error(f"Error processing {tenant_name}: {e}")
 
-        # Build comprehensive report
+        # Tenant reports were already logged one by one, so the final log record only carries the summary
         comprehensive_report = {
             "report_summary": {
                 "total_tenants": total_tenants,
@@ -121,31 +140,30 @@ def generate_user_report(timer: func.TimerRequest) -> None:
                 "failed_tenants": failed_count,
                 "generation_timestamp": datetime.now().isoformat(),
             },
-            "tenant_reports": tenant_summaries,
             "recent_sync_errors": recent_sync_errors,
         }
 
-        # Log comprehensive report
-        logging.info(json.dumps(comprehensive_report, indent=2))
-        logging.info(f"Report generation completed: {len(tenant_summaries)}/{total_tenants} successful")
+        logging.info(orjson.dumps(comprehensive_report).decode())
+
+        comprehensive_report["tenant_reports"] = tenant_reports
+        outblob.set(orjson.dumps(comprehensive_report).decode())
+        logging.info(f"Report generation completed: {len(tenant_reports)}/{total_tenants} successful")
 
     except Exception as e:
         logging.error(f"Critical error in report generation: {str(e)}")
         raise
 
 
-def generate_report_now(req: func.HttpRequest) -> func.HttpResponse:
+def generate_report_now(req: func.HttpRequest, msg: func.Out[str]) -> func.HttpResponse:
     """Manual HTTP trigger to run report generation"""
     try:
         logging.info("Manual report generation triggered via HTTP")
 
-        # Run report generation in background (non-blocking)
-        import asyncio
-
-        asyncio.create_task(generate_user_report(None))
+        # Hand the job to the report-jobs queue so it runs outside this request
+        msg.set(orjson.dumps({"trigger": "manual"}).decode())
 
         return func.HttpResponse(
-            "Report generation started in background. Check logs for results.",
+            "Report generation queued. Results are written to the reports blob container.",
             status_code=202,
         )
 
@@ -153,3 +171,9 @@ def generate_report_now(req: func.HttpRequest) -> func.HttpResponse:
         error_msg = f"Error triggering report generation: {str(e)}"
         logging.error(error_msg)
         return create_error_response(error_message=error_msg, status_code=500)
+
+
+def generate_report_worker(msg: func.QueueMessage, outblob: func.Out[str]) -> None:
+    """Queue trigger that runs report generation jobs queued by generate_report_now"""
+    logging.info(f"Report job received: {msg.get_body().decode('utf-8')}")
+    generate_user_report(None, outblob)
@@ -1,15 +1,20 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import logging
+import os
+import time
 
 from db.db_client import get_connection, init_schema, upsert_many
 from shared.graph_beta_client import GraphBetaClient
 from shared.graph_client import GraphClient
-from shared.utils import clean_error_message
+from shared.utils import TENANT_SYNC_CONCURRENCY, clean_error_message, run_per_tenant
 
 
 logger = logging.getLogger(__name__)
 
+# Tenants synced in parallel by the role sync, tunable on its own against Graph throttling
+ROLE_SYNC_CONCURRENCY = int(os.getenv("ROLE_SYNC_CONCURRENCY", TENANT_SYNC_CONCURRENCY))
+
 
 def detect_tenant_capabilities(tenant_id):
     """Detect if tenant has premium capabilities by testing signin activity access"""
@@ -76,58 +81,109 @@ def fetch_role_members(tenant_id, role_id, use_beta=True):
         return []
 
 
+def fetch_roles_members_batch(tenant_id, role_ids, use_beta=True):
+    """Fetch members of many directory roles, 20 roles per $batch round-trip"""
+    results = {}
+    if not role_ids:
+        return results
+
+    graph = GraphBetaClient(tenant_id) if use_beta else GraphClient(tenant_id)
+    graph.get_token()  # acquire once before the workers share the client
+
+    def fetch_chunk_members(chunk):
+        batch_requests = [
+            {"id": str(i), "method": "GET", "url": f"/directoryRoles/{role_id}/members?$select=id,displayName,userPrincipalName,userType"}
+            for i, role_id in enumerate(chunk)
+        ]
+        chunk_results = {}
+
+        for response in graph.batch(batch_requests):
+            role_id = chunk[int(response["id"])]
+            status = response.get("status")
+
+            if status == 200:
+                body = response.get("body", {})
+                members = body.get("value", [])
+                next_link = body.get("@odata.nextLink")
+                if next_link:
+                    members += graph.get(next_link.removeprefix(graph.base_url))
+                chunk_results[role_id] = members
+            elif status in (429, 500, 502, 503, 504):
+                # Throttled or transient - retry this role on its own with the client's backoff
+                chunk_results[role_id] = fetch_role_members(tenant_id, role_id, use_beta)
+            else:
+                logger.debug("Failed to fetch members for role %s: status %s", role_id, status)
+                chunk_results[role_id] = []
+
+        return chunk_results
+
+    chunks = [role_ids[i : i + 20] for i in range(0, len(role_ids), 20)]
+
+    with ThreadPoolExecutor(max_workers=min(5, len(chunks))) as executor:
+        future_to_chunk = {executor.submit(fetch_chunk_members, chunk): chunk for chunk in chunks}
+
+        for future in as_completed(future_to_chunk):
+            try:
+                results.update(future.result())
+            except Exception as e:
+                chunk = future_to_chunk[future]
+                logger.error(f"Failed to fetch members for {len(chunk)} roles: {e}")
+                for role_id in chunk:
+                    results.setdefault(role_id, [])
+
+    return results
+
+
 def transform_role_data(roles, tenant_id, use_beta=True):
     """Transform role data for database storage"""
+    now_iso = datetime.utcnow().isoformat()
     try:
         logger.info(f"Transforming {len(roles)} roles for tenant {tenant_id}")
 
         role_records = []
         user_role_records = []
 
-        # Use ThreadPoolExecutor to fetch role members concurrently
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_role = {
-                executor.submit(fetch_role_members, tenant_id, role["id"], use_beta): role for role in roles if role.get("id")
-            }
-
-            for future in as_completed(future_to_role):
-                role = future_to_role[future]
-                try:
-                    members = future.result()
-
-                    # Count user members for this role
-                    user_members = [m for m in members if m.get("@odata.type") == "#microsoft.graph.user"]
-                    member_count = len(user_members)
+        # Fetch every role's members up front, 20 roles per $batch round-trip
+        roles = [role for role in roles if role.get("id")]
+        members_by_role = fetch_roles_members_batch(tenant_id, [role["id"] for role in roles], use_beta)
 
-                    # Create role record
-                    role_record = {
+        for role in roles:
+            try:
+                members = members_by_role.get(role["id"], [])
+
+                # Count user members for this role
+                user_members = [m for m in members if m.get("@odata.type") == "#microsoft.graph.user"]
+                member_count = len(user_members)
+
+                # Create role record
+                role_record = {
+                    "tenant_id": tenant_id,
+                    "role_id": role.get("id"),
+                    "role_display_name": role.get("displayName"),
+                    "role_description": role.get("description"),
+                    "member_count": member_count,
+                    "created_at": now_iso,
+                    "last_updated": now_iso,
+                }
+                role_records.append(role_record)
+
+                # Process each user member of this role
+                for member in user_members:
+                    user_role_record = {
+                        "user_id": member.get("id"),
                         "tenant_id": tenant_id,
                         "role_id": role.get("id"),
+                        "user_principal_name": member.get("userPrincipalName"),
                         "role_display_name": role.get("displayName"),
                         "role_description": role.get("description"),
-                        "member_count": member_count,
-                        "created_at": datetime.utcnow().isoformat(),
-                        "last_updated": datetime.utcnow().isoformat(),
+                        "created_at": now_iso,
+                        "last_updated": now_iso,
                     }
-                    role_records.append(role_record)
-
-                    # Process each user member of this role
-                    for member in user_members:
-                        user_role_record = {
-                            "user_id": member.get("id"),
-                            "tenant_id": tenant_id,
-                            "role_id": role.get("id"),
-                            "user_principal_name": member.get("userPrincipalName"),
-                            "role_display_name": role.get("displayName"),
-                            "role_description": role.get("description"),
-                            "created_at": datetime.utcnow().isoformat(),
-                            "last_updated": datetime.utcnow().isoformat(),
-                        }
-                        user_role_records.append(user_role_record)
-
-                except Exception as e:
-                    logger.error(f"Failed to process role {role.get('displayName', 'Unknown')}: {str(e)}")
-                    continue
+                    user_role_records.append(user_role_record)
+
+            except Exception as e:
+                logger.error(f"Failed to process role {role.get('displayName', 'Unknown')}: {str(e)}")
+                continue
 
         logger.info(f"Transformed {len(role_records)} roles and {len(user_role_records)} user role assignments")
         return role_records, user_role_records
@@ -136,13 +192,13 @@ def transform_role_data(roles, tenant_id, use_beta=True):
         raise
 
 
-def sync_roles(tenant_id):
+def sync_roles(tenant_id, tenant_name=None):
     """Main function to sync directory roles and their assignments"""
     init_schema()
 
     try:
-        logger.info(f"Starting role sync for tenant {tenant_id}")
-        start_time = datetime.utcnow()
+        logger.info(f"Starting role sync for tenant {tenant_name or tenant_id}")
+        start_time = time.perf_counter()
 
         # Detect tenant capabilities
         is_premium = detect_tenant_capabilities(tenant_id)
@@ -157,7 +213,7 @@ def sync_roles(tenant_id):
                 "tenant_id": tenant_id,
                 "roles_synced": 0,
                 "user_roles_synced": 0,
-                "duration_seconds": (datetime.utcnow() - start_time).total_seconds(),
+                "duration_seconds": time.perf_counter() - start_time,
             }
 
         # Transform and get role data
@@ -180,7 +236,7 @@ def sync_roles(tenant_id):
             upsert_many("user_rolesV2", user_role_records)
             logger.info(f"Successfully stored {len(user_role_records)} user role assignments")
 
-        duration = (datetime.utcnow() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         logger.info(f"Role sync completed for tenant {tenant_id} in {duration:.2f} seconds")
 
         return {
@@ -192,7 +248,7 @@ def sync_roles(tenant_id):
         }
 
     except Exception as e:
-        duration = (datetime.utcnow() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         error_msg = clean_error_message(str(e), f"Tenant {tenant_id}")
         logger.error(error_msg)
         logger.debug(f"Full error details for tenant {tenant_id}: {str(e)}", exc_info=True)
@@ -205,59 +261,52 @@ def sync_roles(tenant_id):
         }
 
 
-def sync_rolesV2(tenant_ids):
+def _log_role_sync(tenant, result):
+    logger.info(f"  Tenant {tenant['tenant_id']}: {result['roles_synced']} roles, {result['user_roles_synced']} role assignments synced")
+    return result
+
+
+def sync_rolesV2(tenants):
     """Sync roles for multiple tenants concurrently"""
     try:
-        logger.info(f"Starting role sync for {len(tenant_ids)} tenants")
-        start_time = datetime.utcnow()
-        results = []
-
-        # Use ThreadPoolExecutor for concurrent tenant processing
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_tenant = {executor.submit(sync_roles, tenant_id): tenant_id for tenant_id in tenant_ids}
-
-            for future in as_completed(future_to_tenant):
-                tenant_id = future_to_tenant[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-
-                    if result["status"] == "completed":
-                        logger.info(
-                            f"  Tenant {tenant_id}: {result['roles_synced']} roles, {result['user_roles_synced']} role assignments synced"
-                        )
-                    else:
-                        logger.error(f"  Tenant {tenant_id}: {result.get('error', 'Unknown error')}")
-
-                except Exception as e:
-                    logger.error(f"  Tenant {tenant_id}: {str(e)}")
-                    results.append(
-                        {
-                            "status": "error",
-                            "tenant_id": tenant_id,
-                            "error": str(e),
-                            "duration_seconds": 0,
-                        }
-                    )
-
-        duration = (datetime.utcnow() - start_time).total_seconds()
+        logger.info(f"Starting role sync for {len(tenants)} tenants")
+        start_time = time.perf_counter()
+        results = run_per_tenant(tenants, sync_roles, _log_role_sync, max_workers=ROLE_SYNC_CONCURRENCY)
 
-        # Summary
-        successful = [r for r in results if r["status"] == "completed"]
-        failed = [r for r in results if r["status"] == "error"]
-        total_roles = sum(r.get("roles_synced", 0) for r in successful)
-        total_role_assignments = sum(r.get("user_roles_synced", 0) for r in successful)
+        duration = time.perf_counter() - start_time
 
-        logger.info(f"Role sync summary: {len(successful)} successful, {len(failed)} failed")
-        logger.info(f"Total roles synced: {total_roles}")
-        logger.info(f"Total role assignments synced: {total_role_assignments}")
-        logger.info(f"Total duration: {duration:.2f} seconds")
+        # Summary
+        # Single pass over the results for the counts and totals
+        successful_count = failed_count = total_roles = total_role_assignments = 0
+        for r in results:
+            if r["status"] == "completed":
+                successful_count += 1
+                total_roles += r["roles_synced"]
+                total_role_assignments += r["user_roles_synced"]
+            elif r["status"] == "error":
+                failed_count += 1
+
+        logger.info(
+            "Role sync summary: %d successful, %d failed, %d roles, %d role assignments, %.2fs",
+            successful_count,
+            failed_count,
+            total_roles,
+            total_role_assignments,
+            duration,
+            extra={
+                "successful_tenants": successful_count,
+                "failed_tenants": failed_count,
+                "total_roles_synced": total_roles,
+                "total_role_assignments_synced": total_role_assignments,
+                "duration_seconds": round(duration, 2),
+            },
+        )
 
         return {
             "status": "completed",
-            "total_tenants": len(tenant_ids),
-            "successful_tenants": len(successful),
-            "failed_tenants": len(failed),
+            "total_tenants": len(tenants),
+            "successful_tenants": successful_count,
+            "failed_tenants": failed_count,
             "total_roles_synced": total_roles,
             "total_role_assignments_synced": total_role_assignments,
             "duration_seconds": duration,
@@ -272,5 +321,5 @@ def sync_rolesV2(tenant_ids):
         return {
             "status": "error",
             "error": str(e),
-            "duration_seconds": (datetime.utcnow() - start_time).total_seconds(),
+            "duration_seconds": time.perf_counter() - start_time,
         }
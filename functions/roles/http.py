@@ -5,19 +5,22 @@ import azure.functions as func
 from db.db_client import query
 from shared.error_reporting import categorize_sync_errors
 from shared.graph_client import get_tenants
-from shared.utils import create_error_response, create_success_response
+from shared.utils import create_error_response, create_missing_tenant_response, create_success_response, run_blocking_sync
 
 from .helpers import sync_rolesV2
 
 
 # HTTP FUNCTIONS
-def http_sync_roles(req: func.HttpRequest) -> func.HttpResponse:
+async def http_sync_roles(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP trigger for manual role sync"""
+    return await run_blocking_sync(_run_role_sync)
+
+
+def _run_role_sync() -> func.HttpResponse:
     try:
         logging.info("Starting manual role sync")
         tenants = get_tenants()
-        tenant_ids = [tenant["tenant_id"] for tenant in tenants]
-        result = sync_rolesV2(tenant_ids)
+        result = sync_rolesV2(tenants)
 
         if result["status"] == "completed":
             successful_tenants = result["successful_tenants"]
@@ -59,7 +62,7 @@ def get_roles(req: func.HttpRequest) -> func.HttpResponse:
     try:
         tenant_id = req.params.get("tenant_id")
         if not tenant_id:
-            return create_error_response("Tenant ID is required", 400)
+            return create_missing_tenant_response()
 
         roles_query = """
             SELECT r.*,
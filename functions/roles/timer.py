@@ -2,9 +2,9 @@ import logging
 
 import azure.functions as func
 
-from db.db_client import query
 from shared.error_reporting import categorize_sync_errors
 from shared.graph_client import get_tenants
+from shared.utils import analyze_per_tenant
 
 from .helpers import sync_rolesV2
 
@@ -12,6 +12,63 @@ from .helpers import sync_rolesV2
 logger = logging.getLogger(__name__)
 
 
+_ROLES_QUERY = """
+SELECT tenant_id,
+       COUNT(*) as total_roles,
+       SUM(CASE WHEN role_display_name LIKE '%Admin%' OR role_display_name LIKE '%Administrator%' THEN 1 ELSE 0 END) as admin_roles
+FROM roles WHERE tenant_id IN ({placeholders})
+GROUP BY tenant_id
+"""
+
+_ROLE_ASSIGNMENTS_QUERY = """
+SELECT tenant_id,
+       SUM(role_count) as total_assignments,
+       COUNT(*) as users_with_roles,
+       SUM(CASE WHEN role_count > 1 THEN 1 ELSE 0 END) as multi_role_users
+FROM (SELECT tenant_id, COUNT(*) as role_count FROM user_rolesV2 WHERE tenant_id IN ({placeholders}) GROUP BY tenant_id, user_id)
+GROUP BY tenant_id
+"""
+
+
+def _analyze_tenant_roles(tenant, rows):
+    roles_row, assignments_row = rows
+    tenant_name = tenant["display_name"]
+    logging.info(f"Analyzing roles for tenant: {tenant_name}")
+
+    # Calculate metrics
+    total_roles = roles_row.get("total_roles", 0)
+    total_assignments = assignments_row.get("total_assignments", 0)
+    users_with_roles = assignments_row.get("users_with_roles", 0)
+    admin_roles = roles_row.get("admin_roles", 0)
+    multi_role_users = assignments_row.get("multi_role_users", 0)
+
+    # Generate optimization actions
+    actions = []
+    if admin_roles > 0:
+        actions.append(f"Review {admin_roles} admin roles for security")
+
+    if multi_role_users > 0:
+        actions.append(f"Review {multi_role_users} users with multiple roles")
+
+    if total_assignments > 0 and users_with_roles > 0:
+        avg_roles_per_user = total_assignments / users_with_roles
+        if avg_roles_per_user > 2:
+            actions.append(f"High role density: {avg_roles_per_user:.1f} roles per user")
+
+    logging.info(f"✓ {tenant_name}: {total_roles} roles, {users_with_roles} users, {admin_roles} admin roles")
+    return {
+        "status": "completed",
+        "tenant_id": tenant["tenant_id"],
+        "tenant_name": tenant_name,
+        "total_roles": total_roles,
+        "total_assignments": total_assignments,
+        "users_with_roles": users_with_roles,
+        "admin_roles": admin_roles,
+        "multi_role_users": multi_role_users,
+        "actions": actions,
+    }
+
+
 # TIMER FUNCTIONS
 def timer_roles_sync(timer: func.TimerRequest) -> None:
     """Timer trigger for role sync across all tenants"""
@@ -20,9 +77,7 @@ def timer_roles_sync(timer: func.TimerRequest) -> None:
 
     logging.info("Starting scheduled role sync V2")
     tenants = get_tenants()
-    tenant_ids = [tenant["tenant_id"] for tenant in tenants]
-
-    result = sync_rolesV2(tenant_ids)
+    result = sync_rolesV2(tenants)
 
     if result["status"] == "completed":
         logging.info(
@@ -41,72 +96,9 @@ def get_roles_analysis(timer: func.TimerRequest) -> None:
 
     logging.info("Starting scheduled roles analysis across all tenants")
     tenants = get_tenants()
-    results = []
-
-    for tenant in tenants:
-        try:
-            tenant_id = tenant["tenant_id"]
-            tenant_name = tenant["display_name"]
-
-            logging.info(f"Analyzing roles for tenant: {tenant_name}")
-
-            # Query role data for this tenant
-            total_roles_query = "SELECT COUNT(*) as count FROM roles WHERE tenant_id = ?"
-            total_roles_result = query(total_roles_query, (tenant_id,))
-
-            total_assignments_query = "SELECT COUNT(*) as count FROM user_rolesV2 WHERE tenant_id = ?"
-            total_assignments_result = query(total_assignments_query, (tenant_id,))
-
-            users_with_roles_query = "SELECT COUNT(DISTINCT user_id) as count FROM user_rolesV2 WHERE tenant_id = ?"
-            users_with_roles_result = query(users_with_roles_query, (tenant_id,))
-
-            admin_roles_query = "SELECT COUNT(*) as count FROM roles WHERE tenant_id = ? AND (role_display_name LIKE '%Admin%' OR role_display_name LIKE '%Administrator%')"
-            admin_roles_result = query(admin_roles_query, (tenant_id,))
-
-            multi_role_users_query = "SELECT COUNT(*) as count FROM (SELECT user_id FROM user_rolesV2 WHERE tenant_id = ? GROUP BY user_id HAVING COUNT(role_id) > 1)"
-            multi_role_users_result = query(multi_role_users_query, (tenant_id,))
-
-            # Calculate metrics
-            total_roles = total_roles_result[0]["count"] if total_roles_result else 0
-            total_assignments = total_assignments_result[0]["count"] if total_assignments_result else 0
-            users_with_roles = users_with_roles_result[0]["count"] if users_with_roles_result else 0
-            admin_roles = admin_roles_result[0]["count"] if admin_roles_result else 0
-            multi_role_users = multi_role_users_result[0]["count"] if multi_role_users_result else 0
-
-            # Generate optimization actions
-            actions = []
-            if admin_roles > 0:
-                actions.append(f"Review {admin_roles} admin roles for security")
-
-            if multi_role_users > 0:
-                actions.append(f"Review {multi_role_users} users with multiple roles")
-
-            if total_assignments > 0 and users_with_roles > 0:
-                avg_roles_per_user = total_assignments / users_with_roles
-                if avg_roles_per_user > 2:
-                    actions.append(f"High role density: {avg_roles_per_user:.1f} roles per user")
-
-            result = {
-                "status": "completed",
-                "tenant_id": tenant_id,
-                "tenant_name": tenant_name,
-                "total_roles": total_roles,
-                "total_assignments": total_assignments,
-                "users_with_roles": users_with_roles,
-                "admin_roles": admin_roles,
-                "multi_role_users": multi_role_users,
-                "actions": actions,
-            }
-
-            logging.info(f"✓ {tenant_name}: {total_roles} roles, {users_with_roles} users, {admin_roles} admin roles")
-            results.append(result)
-
-        except Exception as e:
-            logging.error(f"✗ {tenant_name}: {str(e)}")
-            results.append({"status": "error", "tenant_id": tenant_id, "tenant_name": tenant_name, "error": str(e)})
+    results, failed_count = analyze_per_tenant(tenants, (_ROLES_QUERY, _ROLE_ASSIGNMENTS_QUERY), _analyze_tenant_roles, "Roles")
 
     # Log summary
-    failed_count = len([r for r in results if r["status"] == "error"])
 
     if failed_count > 0:
         logging.warning(f"Roles analysis completed with {failed_count} errors out of {len(tenants)} tenants")
@@ -114,10 +106,13 @@ def get_roles_analysis(timer: func.TimerRequest) -> None:
         logging.info(f"✓ Roles analysis completed successfully for {len(tenants)} tenants")
 
     # Log total metrics across all tenants
-    total_roles_all = sum(r.get("total_roles", 0) for r in results if r["status"] == "completed")
-    total_assignments_all = sum(r.get("total_assignments", 0) for r in results if r["status"] == "completed")
-    total_users_all = sum(r.get("users_with_roles", 0) for r in results if r["status"] == "completed")
-    total_admin_roles_all = sum(r.get("admin_roles", 0) for r in results if r["status"] == "completed")
+    total_roles_all = total_assignments_all = total_users_all = total_admin_roles_all = 0
+    for r in results:
+        if r["status"] == "completed":
+            total_roles_all += r["total_roles"]
+            total_assignments_all += r["total_assignments"]
+            total_users_all += r["users_with_roles"]
+            total_admin_roles_all += r["admin_roles"]
 
     logging.info(
         f" Total across all tenants: {total_roles_all} roles, {total_assignments_all} assignments, {total_users_all} users, {total_admin_roles_all} admin roles"
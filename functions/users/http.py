@@ -4,52 +4,56 @@ import logging
 
 import azure.functions as func
 
-from db.db_client import execute_query, query
+from db.db_client import execute_query, execute_transaction, query
 from shared.error_reporting import categorize_sync_errors
 from shared.graph_beta_client import GraphBetaClient
 from shared.graph_client import get_tenants
-from shared.utils import clean_error_message, create_bulk_operation_response, create_error_response, create_success_response
+from shared.utils import (
+    create_bulk_operation_response,
+    create_error_response,
+    create_missing_tenant_response,
+    create_success_response,
+    get_json_body,
+    run_blocking_sync,
+    run_per_tenant,
+)
 
 from .helpers import sync_users
 
 
+# usersV2 columns edit_user may change; built once instead of on every request
+EDITABLE_USER_FIELDS = (
+    "display_name",
+    "given_name",
+    "surname",
+    "job_title",
+    "department",
+    "office_location",
+    "mobile_phone",
+    "business_phones",
+    "account_enabled",
+)
+
+
 # HTTP SYNC FUNCTIONS
-def http_users_sync(req: func.HttpRequest) -> func.HttpResponse:
+async def http_users_sync(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP trigger for manual user sync"""
+    return await run_blocking_sync(_run_user_sync)
+
+
+def _user_sync_result(tenant, result):
+    logging.info(f"✓ {tenant['display_name']}: {result['users_synced']} users synced")
+    return {"status": "completed", "tenant_id": tenant["tenant_id"], "users_synced": result["users_synced"]}
+
+
+def _run_user_sync() -> func.HttpResponse:
     try:
         logging.info("Starting manual user sync V2")
         tenants = get_tenants()
-        total_users = 0
-        results = []
-
-        for tenant in tenants:
-            try:
-                result = sync_users(tenant["tenant_id"], tenant["display_name"])
-                if result["status"] == "success":
-                    logging.info(f"✓ {tenant['display_name']}: {result['users_synced']} users synced")
-                    total_users += result["users_synced"]
-                    results.append(
-                        {
-                            "status": "completed",
-                            "tenant_id": tenant["tenant_id"],
-                            "users_synced": result["users_synced"],
-                        }
-                    )
-                else:
-                    logging.error(f"✗ {tenant['display_name']}: {result['error']}")
-                    results.append(
-                        {
-                            "status": "error",
-                            "tenant_id": tenant["tenant_id"],
-                            "error": result.get("error", "Unknown error"),
-                        }
-                    )
-            except Exception as e:
-                logging.error(clean_error_message(str(e), tenant["display_name"]))
-                results.append({"status": "error", "tenant_id": tenant["tenant_id"], "error": str(e)})
+        results = run_per_tenant(tenants, sync_users, _user_sync_result)
+        total_users = sum(r["users_synced"] for r in results if r["status"] == "completed")
 
-        failed_count = len([r for r in results if r["status"] == "error"])
-        if failed_count > 0:
+        if any(r["status"] == "error" for r in results):
             categorize_sync_errors(results, "User V2 HTTP")
 
         return create_success_response(
@@ -75,7 +79,7 @@ def get_user(req: func.HttpRequest) -> func.HttpResponse:
         if not user_id:
             return create_error_response("User ID is required", 400)
         if not tenant_id:
-            return create_error_response("Tenant ID is required", 400)
+            return create_missing_tenant_response()
 
         user_query = """
             SELECT u.*,
@@ -114,7 +118,28 @@ def get_users(req: func.HttpRequest) -> func.HttpResponse:
     try:
         tenant_id = req.params.get("tenant_id")
         if not tenant_id:
-            return create_error_response("Tenant ID is required", 400)
+            return create_missing_tenant_response()
+
+        # summary_only=true returns just the counts, computed in SQL, without listing users
+        if req.params.get("summary_only", "").lower() == "true":
+            summary_query = """
+                SELECT COUNT(*) as total_users,
+                       SUM(CASE WHEN account_enabled = 1 THEN 1 ELSE 0 END) as enabled_users,
+                       SUM(CASE WHEN is_mfa_compliant = 1 THEN 1 ELSE 0 END) as mfa_compliant_users,
+                       SUM(CASE WHEN is_global_admin = 1 THEN 1 ELSE 0 END) as global_admins,
+                       SUM(CASE WHEN account_type = 'Guest' THEN 1 ELSE 0 END) as guest_users
+                FROM usersV2
+                WHERE tenant_id = ?
+            """
+            summary = {key: value or 0 for key, value in query(summary_query, (tenant_id,))[0].items()}
+            summary["disabled_users"] = summary["total_users"] - summary["enabled_users"]
+
+            return create_success_response(
+                data={"summary": summary},
+                tenant_id=tenant_id,
+                operation="get_users",
+                message=f"Summarized {summary['total_users']} users",
+            )
 
         users_query = """
             SELECT u.user_id, u.display_name, u.user_principal_name, u.account_enabled,
@@ -146,7 +171,7 @@ def get_users(req: func.HttpRequest) -> func.HttpResponse:
 def edit_user(req: func.HttpRequest) -> func.HttpResponse:
     """Edit user properties"""
     try:
-        body = req.get_json()
+        body = get_json_body(req)
         if not body:
             return create_error_response("Request body is required", 400)
 
@@ -160,19 +185,7 @@ def edit_user(req: func.HttpRequest) -> func.HttpResponse:
         update_fields = []
         params = []
 
-        editable_fields = [
-            "display_name",
-            "given_name",
-            "surname",
-            "job_title",
-            "department",
-            "office_location",
-            "mobile_phone",
-            "business_phones",
-            "account_enabled",
-        ]
-
-        for field in editable_fields:
+        for field in EDITABLE_USER_FIELDS:
             if field in body:
                 update_fields.append(f"{field} = ?")
                 params.append(body[field])
@@ -228,7 +241,14 @@ def reset_user_password(req: func.HttpRequest) -> func.HttpResponse:
         if not user_id or not tenant_id:
             return create_error_response("user_id and tenant_id are required", 400)
 
-        body = req.get_json()
+        # A missing or malformed body must not fall through to the default password
+        try:
+            body = req.get_json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            return create_error_response("Request body must be a JSON object", 400)
+
         temp_password = body.get("temporary_password", "TempPass123!")
         force_change = body.get("force_change_password_next_sign_in", True)
 
@@ -256,7 +276,7 @@ def reset_user_password(req: func.HttpRequest) -> func.HttpResponse:
 def create_user(req: func.HttpRequest) -> func.HttpResponse:
     """Create a new user"""
     try:
-        body = req.get_json()
+        body = get_json_body(req)
         if not body:
             return create_error_response("Request body is required", 400)
 
@@ -318,10 +338,12 @@ def delete_user(req: func.HttpRequest) -> func.HttpResponse:
         client.delete_user(user_id)
 
         # Remove from database
-        execute_query("DELETE FROM usersV2 WHERE user_id = ? AND tenant_id = ?", (user_id, tenant_id))
-        execute_query("DELETE FROM user_licensesV2 WHERE user_id = ? AND tenant_id = ?", (user_id, tenant_id))
-        execute_query("DELETE FROM user_rolesV2 WHERE user_id = ? AND tenant_id = ?", (user_id, tenant_id))
-        execute_query("DELETE FROM user_groupsV2 WHERE user_id = ? AND tenant_id = ?", (user_id, tenant_id))
+        execute_transaction(
+            [
+                (f"DELETE FROM {table} WHERE user_id = ? AND tenant_id = ?", (user_id, tenant_id))
+                for table in ("usersV2", "user_licensesV2", "user_rolesV2", "user_groupsV2")
+            ]
+        )
 
         return create_success_response(
             data={"user_id": user_id, "deleted": True}, tenant_id=tenant_id, operation="delete_user", message=f"Deleted user {user_id}"
@@ -335,7 +357,7 @@ def delete_user(req: func.HttpRequest) -> func.HttpResponse:
 def bulk_disable_users(req: func.HttpRequest) -> func.HttpResponse:
     """Bulk disable multiple users"""
     try:
-        body = req.get_json()
+        body = get_json_body(req)
         if not body:
             return create_error_response("Request body is required", 400)
 
@@ -4,9 +4,43 @@ import azure.functions as func
 
 from shared.error_reporting import categorize_sync_errors
 from shared.graph_client import get_tenants
-from shared.utils import clean_error_message
+from shared.utils import run_per_tenant
 
-from .helpers import calculate_inactive_users, calculate_mfa_compliance, sync_users
+from .helpers import calculate_inactive_users, calculate_mfa_compliance, get_enabled_users, sync_users
+
+
+def _sync_and_analyze(tenant_id, tenant_name):
+    """Sync one tenant's users and, on success, run the post-sync analysis in the same worker thread"""
+    result = sync_users(tenant_id, tenant_name)
+    if result["status"] != "success":
+        return result
+
+    # an empty tenant has nothing to analyze, so skip the user query and both passes
+    if not result.get("users_synced"):
+        return result
+
+    try:
+        # both analyses read the same enabled users, so fetch them once
+        users = get_enabled_users(tenant_id)
+        result["inactive_result"] = calculate_inactive_users(tenant_id, users=users)
+        result["mfa_result"] = calculate_mfa_compliance(tenant_id, users=users)
+    except Exception as e:
+        logging.error(f"Analysis error: {str(e)}")
+    return result
+
+
+def _user_sync_result(tenant, result):
+    logging.info(f"✓ V2 {tenant['display_name']}: {result['users_synced']} users synced")
+    if "mfa_result" in result:
+        logging.info(f"  Inactive users: {result['inactive_result'].get('inactive_count', 0)}")
+        logging.info(f"  MFA compliance: {result['mfa_result'].get('compliance_rate', 0)}%")
+
+    return {
+        "status": "completed",
+        "tenant_id": tenant["tenant_id"],
+        "users_synced": result["users_synced"],
+        "user_licenses_synced": result.get("user_licenses_replaced", 0),
+    }
 
 
 # TIMER FUNCTIONS
@@ -15,49 +49,9 @@ def timer_tenants_sync(timer: func.TimerRequest) -> None:
     if timer.past_due:
         logging.warning("User sync V2 timer is past due!")
 
-    tenants = get_tenants()
-    tenants.reverse()  # Process in reverse order
-    results = []
-
-    for tenant in tenants:
-        try:
-            result = sync_users(tenant["tenant_id"], tenant["display_name"])
-            if result["status"] == "success":
-                logging.info(f"✓ V2 {tenant['display_name']}: {result['users_synced']} users synced")
-                results.append(
-                    {
-                        "status": "completed",
-                        "tenant_id": tenant["tenant_id"],
-                        "users_synced": result["users_synced"],
-                        "user_licenses_synced": result.get("user_licenses_replaced", 0),
-                    }
-                )
-
-                # Run analysis after successful sync
-                try:
-                    inactive_result = calculate_inactive_users(tenant["tenant_id"])
-                    logging.info(f"  Inactive users: {inactive_result.get('inactive_count', 0)}")
-
-                    mfa_result = calculate_mfa_compliance(tenant["tenant_id"])
-                    logging.info(f"  MFA compliance: {mfa_result.get('compliance_rate', 0)}%")
-
-                except Exception as e:
-                    logging.error(f"Analysis error: {str(e)}")
-
-            else:
-                logging.error(f"✗ V2 {tenant['display_name']}: {result['error']}")
-                results.append(
-                    {
-                        "status": "error",
-                        "tenant_id": tenant["tenant_id"],
-                        "error": result.get("error", "Unknown error"),
-                    }
-                )
-        except Exception as e:
-            logging.error(clean_error_message(str(e), tenant["display_name"]))
-            results.append({"status": "error", "tenant_id": tenant["tenant_id"], "error": str(e)})
+    # process tenants in reverse so this sync starts away from the license/group syncs
+    results = run_per_tenant(get_tenants(), _sync_and_analyze, _user_sync_result, reverse=True)
 
     # Use centralized error reporting
-    failed_count = len([r for r in results if r["status"] == "error"])
-    if failed_count > 0:
+    if any(r["status"] == "error" for r in results):
         categorize_sync_errors(results, "User V2")
@@ -3,18 +3,35 @@
 # Make shared imports available
 from .error_reporting import aggregate_recent_sync_errors, categorize_sync_errors
 from .graph_beta_client import GraphBetaClient
-from .graph_client import GraphClient, get_tenants
-from .utils import clean_error_message, create_bulk_operation_response, create_error_response, create_success_response
+from .graph_client import GraphClient, get_tenant_by_id, get_tenants, invalidate_tenants_cache
+from .utils import (
+    analyze_per_tenant,
+    clean_error_message,
+    create_bulk_operation_response,
+    create_error_response,
+    create_missing_tenant_response,
+    create_success_response,
+    get_json_body,
+    run_blocking_sync,
+    run_per_tenant,
+)
 
 
 __all__ = [
     "GraphClient",
     "GraphBetaClient",
     "get_tenants",
+    "get_tenant_by_id",
+    "invalidate_tenants_cache",
     "clean_error_message",
     "create_error_response",
     "create_success_response",
     "create_bulk_operation_response",
+    "create_missing_tenant_response",
+    "get_json_body",
+    "run_blocking_sync",
+    "run_per_tenant",
+    "analyze_per_tenant",
     "categorize_sync_errors",
     "aggregate_recent_sync_errors",
 ]
@@ -21,6 +21,12 @@ load_local_settings()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# One pooled session per worker, so the org and device syncs reuse keep-alive connections to the Automox API
+_amx_session = requests.Session()
+_amx_adapter = requests.adapters.HTTPAdapter(max_retries=3)
+_amx_session.mount("http://", _amx_adapter)
+_amx_session.mount("https://", _amx_adapter)
+
 
 def format_datetime(dt_str: str | None) -> str | None:
     """Format datetime string to ISO format with proper timezone handling."""
@@ -73,20 +79,14 @@ class AutomoxApi:
     def __init__(self):
         self.base_uri = os.environ["AMX_BASE_URI"]
         self.dit_api_key = os.environ["AMX_DIT_API_KEY"]
-        self.session = self._create_session()
-
-    def _create_session(self) -> requests.Session:
-        session = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(max_retries=3)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
+        self.session = _amx_session
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.session.close()
+        # The session is shared across instances, so its pooled connections stay open
+        pass
 
     def get_api_key(self) -> str:
         return self.dit_api_key
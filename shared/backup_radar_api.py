@@ -7,6 +7,8 @@ import requests
 
 load_dotenv()
 
+_session = requests.Session()
+
 
 class APIError(Exception):
     pass
@@ -23,25 +25,25 @@ def get_backups(days_back: int = 1) -> dict:
     start = datetime.now(UTC) - timedelta(days=days_back)
     params = {"page": 1, "size": 1000, "date": start.strftime("%Y-%m-%d")}
 
-    resp = requests.get(f"{os.getenv('BACKUP_RADAR_BASE_URI')}/backups", headers=_headers(), params=params, timeout=30)
+    resp = _session.get(f"{os.getenv('BACKUP_RADAR_BASE_URI')}/backups", headers=_headers(), params=params, timeout=30)
     resp.raise_for_status()
     return resp.json()
 
 
 def get_backup_retired() -> dict:
-    resp = requests.get(f"{os.getenv('BACKUP_RADAR_BASE_URI')}/backups/retired", headers=_headers(), timeout=30)
+    resp = _session.get(f"{os.getenv('BACKUP_RADAR_BASE_URI')}/backups/retired", headers=_headers(), timeout=30)
     resp.raise_for_status()
     return resp.json()
 
 
 def get_backup_overview() -> dict:
-    resp = requests.get(f"{os.getenv('BACKUP_RADAR_BASE_URI')}/backups/overview", headers=_headers(), timeout=30)
+    resp = _session.get(f"{os.getenv('BACKUP_RADAR_BASE_URI')}/backups/overview", headers=_headers(), timeout=30)
     resp.raise_for_status()
     return resp.json()
 
 
 def get_backup_filters() -> dict:
-    resp = requests.get(f"{os.getenv('BACKUP_RADAR_BASE_URI')}/backups/filters", headers=_headers(), timeout=30)
+    resp = _session.get(f"{os.getenv('BACKUP_RADAR_BASE_URI')}/backups/filters", headers=_headers(), timeout=30)
     resp.raise_for_status()
     return resp.json()
 
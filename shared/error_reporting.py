@@ -1,5 +1,6 @@
 from datetime import datetime
 import logging
+import re
 from typing import Any
 
 from db.db_client import query
@@ -7,7 +8,7 @@ from db.db_client import query
 
 logger = logging.getLogger(__name__)
 
-# Global storage for recent sync results (in-memory)
+# Global storage for the failed results of each sync type's latest run (in-memory)
 # In a production environment, this would be stored in a database
 _recent_sync_results = {
     "user_sync": [],
@@ -16,6 +17,12 @@ _recent_sync_results = {
     "service_principal_sync": [],
 }
 
+# Error category patterns, compiled once and matched case-insensitively against each failure
+_AUTH_ERROR_RE = re.compile(r"401|authorization_identitynotfound|unauthorized", re.IGNORECASE)
+_PERMISSION_ERROR_RE = re.compile(r"403|forbidden|insufficient privileges", re.IGNORECASE)
+_SERVICE_ERROR_RE = re.compile(r"503|service ?unavailable", re.IGNORECASE)
+_TIMEOUT_ERROR_RE = re.compile(r"timeout", re.IGNORECASE)
+
 
 def categorize_sync_errors(results: list[dict], sync_type: str = "sync", log_output: bool = True) -> dict[str, Any]:
     """
@@ -37,35 +44,42 @@ def categorize_sync_errors(results: list[dict], sync_type: str = "sync", log_out
     other_errors = []  # Everything else
 
     # Process results
-    successful = [r for r in results if r.get("status") == "completed"]
-    failed = [r for r in results if r.get("status") == "error"]
+    successful_count = 0
+    failed = []
+    for r in results:
+        status = r.get("status")
+        if status == "completed":
+            successful_count += 1
+        elif status == "error":
+            failed.append(r)
 
     # Categorize each failed result
     for result in failed:
-        tenant_id = result.get("tenant_id", "unknown")
-        error_msg = str(result.get("error", "")).lower()
-
-        if "401" in error_msg or "authorization_identitynotfound" in error_msg or "unauthorized" in error_msg:
-            auth_errors.append({"tenant_id": tenant_id, "error": result.get("error", "")})
-        elif "403" in error_msg or "forbidden" in error_msg or "insufficient privileges" in error_msg:
-            permission_errors.append({"tenant_id": tenant_id, "error": result.get("error", "")})
-        elif "503" in error_msg or "service unavailable" in error_msg or "serviceunavailable" in error_msg:
-            service_errors.append({"tenant_id": tenant_id, "error": result.get("error", "")})
-        elif "timeout" in error_msg or "functiontimeout" in error_msg:
-            timeout_errors.append({"tenant_id": tenant_id, "error": result.get("error", "")})
+        error = result.get("error", "")
+        error_msg = str(error)
+        entry = {"tenant_id": result.get("tenant_id", "unknown"), "error": error}
+
+        if _AUTH_ERROR_RE.search(error_msg):
+            auth_errors.append(entry)
+        elif _PERMISSION_ERROR_RE.search(error_msg):
+            permission_errors.append(entry)
+        elif _SERVICE_ERROR_RE.search(error_msg):
+            service_errors.append(entry)
+        elif _TIMEOUT_ERROR_RE.search(error_msg):
+            timeout_errors.append(entry)
         else:
-            other_errors.append({"tenant_id": tenant_id, "error": result.get("error", "")})
+            other_errors.append(entry)
 
-    # Store results globally for later retrieval
+    # Store failures globally for later retrieval; the report only needs their count and a few samples
     global _recent_sync_results
-    _recent_sync_results[f"{sync_type.lower()}_sync"] = results
+    _recent_sync_results[f"{sync_type.lower()}_sync"] = failed
 
     # Create summary
     error_summary = {
         "sync_type": sync_type,
         "timestamp": datetime.now().isoformat(),
         "total_tenants": len(results),
-        "successful_tenants": len(successful),
+        "successful_tenants": successful_count,
         "failed_tenants": len(failed),
         "error_categories": {
             "authentication_errors": len(auth_errors),
@@ -83,8 +97,11 @@ def categorize_sync_errors(results: list[dict], sync_type: str = "sync", log_out
         },
     }
 
-    # Log summary if requested
-    if log_output and failed:
+    # Log summary if requested; a couple of failures are clearer logged individually
+    if log_output and 0 < len(failed) < 3:
+        for result in failed:
+            logger.warning(f"{sync_type} sync failed for tenant {result.get('tenant_id', 'unknown')}: {result.get('error', '')}")
+    elif log_output and failed:
         logger.warning(f"{sync_type} sync errors summary:")
         logger.warning(f"  Total: {len(failed)}/{len(results)} tenants failed")
         logger.warning(f"  Auth errors: {len(auth_errors)}")
@@ -110,39 +127,29 @@ def aggregate_recent_sync_errors() -> dict[str, Any]:
         Dictionary with recent sync status and tenant information
     """
     try:
-        # Query recent successful syncs to determine which tenants are healthy
-        successful_tenants_query = """
-        SELECT DISTINCT tenant_id,
-               MAX(last_updated) as last_sync
-        FROM usersV2
-        WHERE last_updated >= datetime('now', '-24 hours')
-        GROUP BY tenant_id
-        ORDER BY last_sync DESC
-        """
-
-        successful_tenants = query(successful_tenants_query)
-
-        # Query basic tenant info (if available)
+        # One pass over usersV2: user count and latest sync per tenant, flagging tenants synced in the last 24 hours
         tenant_info_query = """
-        SELECT tenant_id, COUNT(*) as user_count
+        SELECT tenant_id,
+               COUNT(*) as user_count,
+               MAX(last_updated) as last_sync,
+               MAX(last_updated) >= datetime('now', '-24 hours') as synced_recently
         FROM usersV2
         GROUP BY tenant_id
+        ORDER BY last_sync DESC
         """
 
         tenant_info = query(tenant_info_query)
-        tenant_map = {t["tenant_id"]: t["user_count"] for t in tenant_info}
-
-        # Enhance successful tenants with user count
-        for tenant in successful_tenants:
-            tenant["user_count"] = tenant_map.get(tenant["tenant_id"], 0)
+        successful_tenants = [
+            {"tenant_id": t["tenant_id"], "last_sync": t["last_sync"], "user_count": t["user_count"]}
+            for t in tenant_info
+            if t["synced_recently"]
+        ]
 
         # Get recent error patterns from global storage
         recent_errors = {}
-        for sync_type, results in _recent_sync_results.items():
-            if results:  # Only include if we have recent results
-                failed = [r for r in results if r.get("status") == "error"]
-                if failed:
-                    recent_errors[sync_type] = {"count": len(failed), "sample_errors": [r.get("error", "") for r in failed[:3]]}
+        for sync_type, failed in _recent_sync_results.items():
+            if failed:  # Only include sync types with recent failures
+                recent_errors[sync_type] = {"count": len(failed), "sample_errors": [r.get("error", "") for r in failed[:3]]}
 
         return {
             "successful_tenants": successful_tenants,
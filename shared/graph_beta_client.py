@@ -1,15 +1,16 @@
 import logging
-import os
-import time
+import secrets
+import string
 
-import msal
 import requests
 
-
-# Note: time.sleep() is acceptable here because:
-# 1. Azure Functions handles scaling automatically
-# 2. These are legitimate API rate limits that must be respected
-# 3. The GraphBetaClient is synchronous by design.
+from shared.graph_client import (
+    MAX_THROTTLE_RETRIES,
+    _post_batch,
+    _request_with_retry,
+    get_graph_token,
+    graph_session,
+)
 
 
 class GraphBetaClient:
@@ -18,30 +19,10 @@ class GraphBetaClient:
             raise ValueError("TenantID is needed")
 
         self.tenant_id = tenant_id
-        self.client_id = os.getenv("CLIENT_ID")
-        self.client_secret = os.getenv("CLIENT_SECRET")
         self.base_url = "https://graph.microsoft.com/beta"
-        self.token = None
-        self.token_expires = 0
 
     def get_token(self):
-        if self.token and time.time() < self.token_expires:
-            return self.token
-
-        app = msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=f"https://login.microsoftonline.com/{self.tenant_id}",
-            client_credential=self.client_secret,
-        )
-
-        result = app.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
-
-        if "access_token" in result:
-            self.token = result["access_token"]
-            self.token_expires = time.time() + result.get("expires_in", 3600) - 300
-            return self.token
-        else:
-            raise Exception(f"Token acquisition failed: {result.get('error', 'Unknown error')}")
+        return get_graph_token(self.tenant_id)
 
     def get(
         self,
@@ -80,13 +61,8 @@ class GraphBetaClient:
         while url:
             # Only use params for the first request, pagination URLs already include parameters
             current_params = params if not all_results else None
-            response = requests.get(url, headers=headers, params=current_params)
-
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 5))
-                logging.warning(f"Rate limited - waiting {retry_after} seconds")
-                time.sleep(retry_after)
-                continue
+            # Throttled or temporarily unavailable pages are retried a bounded number of times
+            response = _request_with_retry(self.tenant_id, "GET", url, headers=headers, params=current_params)
 
             # Enhanced error handling with detailed diagnostics
             if response.status_code == 401:
@@ -95,7 +71,7 @@ class GraphBetaClient:
                     error_details = response.json()
                     if "error" in error_details:
                         error_msg += f"Error: {error_details['error'].get('code', 'Unknown')} - {error_details['error'].get('message', 'No details')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     error_msg += "Likely causes: Missing admin consent, expired credentials, or tenant suspended."
                 logging.error(error_msg)
                 raise requests.exceptions.HTTPError(error_msg, response=response)
@@ -106,20 +82,15 @@ class GraphBetaClient:
                     error_details = response.json()
                     if "error" in error_details:
                         error_msg += f"Error: {error_details['error'].get('code', 'Unknown')} - {error_details['error'].get('message', 'No details')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     error_msg += "Likely causes: Missing Graph permissions, conditional access policies, or security defaults."
                 logging.error(error_msg)
                 raise requests.exceptions.HTTPError(error_msg, response=response)
 
             elif response.status_code == 503:
-                error_msg = f"503 Service Unavailable - Tenant {self.tenant_id}: Microsoft Graph service temporarily unavailable."
-                logging.warning(error_msg + " Retrying after delay...")
-                retry_count = getattr(self, "_retry_count", 0)
-                self._retry_count = retry_count + 1
-                wait_time = min(30, 5 * (2**retry_count))  # Max 30 seconds
-                logging.info(f"Waiting {wait_time} seconds before retry #{self._retry_count}")
-                time.sleep(wait_time)
-                continue
+                error_msg = f"503 Service Unavailable - Tenant {self.tenant_id}: Microsoft Graph service still unavailable after {MAX_THROTTLE_RETRIES} retries."
+                logging.error(error_msg)
+                raise requests.exceptions.HTTPError(error_msg, response=response)
 
             response.raise_for_status()
             data = response.json()
@@ -134,6 +105,10 @@ class GraphBetaClient:
 
         return all_results
 
+    def batch(self, batch_requests):
+        """Send requests through the $batch endpoint, 20 per round-trip (Graph limit)"""
+        return _post_batch(self.base_url, self.tenant_id, batch_requests)
+
     def patch_user(self, user_id, update_data):
         headers = {
             "Authorization": f"Bearer {self.get_token()}",
@@ -141,13 +116,7 @@ class GraphBetaClient:
         }
 
         url = f"{self.base_url}/users/{user_id}"
-        response = requests.patch(url, headers=headers, json=update_data)
-
-        if response.status_code == 429:
-            retry_after = int(response.headers.get("Retry-After", 5))
-            logging.warning(f"Rate limited - waiting {retry_after} seconds")
-            time.sleep(retry_after)
-            response = requests.patch(url, headers=headers, json=update_data)
+        response = _request_with_retry(self.tenant_id, "PATCH", url, headers=headers, json=update_data)
 
         response.raise_for_status()
         return response.json() if response.content else {}
@@ -185,13 +154,7 @@ class GraphBetaClient:
             logging.info(f"Original user data: {user_data}")
             logging.info(f"Filtered Graph API data: {graph_user_data}")
 
-            response = requests.post(url, headers=headers, json=graph_user_data)
-
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 5))
-                logging.warning(f"Rate limited while creating user - waiting {retry_after} seconds")
-                time.sleep(retry_after)
-                response = requests.post(url, headers=headers, json=user_data)
+            response = _request_with_retry(self.tenant_id, "POST", url, headers=headers, json=graph_user_data)
 
             if response.status_code == 401:
                 error_msg = "401 Unauthorized - Cannot create user: Authentication failed"
@@ -212,7 +175,7 @@ class GraphBetaClient:
                 try:
                     error_details = response.json()
                     error_msg = f"400 Bad Request - Invalid user data: {error_details.get('error', {}).get('message', 'Unknown error')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     error_msg = "400 Bad Request - Invalid user data"
                 logging.error(error_msg)
                 return {"status": "error", "error": error_msg}
@@ -237,7 +200,7 @@ class GraphBetaClient:
             try:
                 error_details = response.json()
                 logging.error(f"Response body: {error_details}")
-            except Exception:
+            except ValueError:
                 logging.error(f"Response text: {response.text}")
 
             response.raise_for_status()
@@ -265,13 +228,7 @@ class GraphBetaClient:
             logging.info(f"Deleting user {user_id} in tenant: {self.tenant_id}")
             logging.info(f"Graph Beta API URL: {url}")
 
-            response = requests.delete(url, headers=headers)
-
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 5))
-                logging.warning(f"Rate limited while deleting user - waiting {retry_after} seconds")
-                time.sleep(retry_after)
-                response = requests.delete(url, headers=headers)
+            response = _request_with_retry(self.tenant_id, "DELETE", url, headers=headers)
 
             if response.status_code == 401:
                 error_msg = "401 Unauthorized - Cannot delete user: Authentication failed"
@@ -292,7 +249,7 @@ class GraphBetaClient:
                 try:
                     error_details = response.json()
                     error_msg = f"400 Bad Request - Invalid request: {error_details.get('error', {}).get('message', 'Unknown error')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     error_msg = "400 Bad Request - Invalid request"
                 logging.error(error_msg)
                 return {"status": "error", "error": error_msg}
@@ -311,7 +268,7 @@ class GraphBetaClient:
             try:
                 error_details = response.json()
                 logging.error(f"Response body: {error_details}")
-            except Exception:
+            except ValueError:
                 logging.error(f"Response text: {response.text}")
 
             response.raise_for_status()
@@ -340,13 +297,7 @@ class GraphBetaClient:
             logging.info(f"Graph Beta API URL: {url}")
             logging.info(f"Update data: {user_updates}")
 
-            response = requests.patch(url, headers=headers, json=user_updates)
-
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 5))
-                logging.warning(f"Rate limited while updating user - waiting {retry_after} seconds")
-                time.sleep(retry_after)
-                response = requests.patch(url, headers=headers, json=user_updates)
+            response = _request_with_retry(self.tenant_id, "PATCH", url, headers=headers, json=user_updates)
 
             if response.status_code == 401:
                 error_msg = "401 Unauthorized - Cannot update user: Authentication failed"
@@ -367,7 +318,7 @@ class GraphBetaClient:
                 try:
                     error_details = response.json()
                     error_msg = f"400 Bad Request - Invalid update data: {error_details.get('error', {}).get('message', 'Unknown error')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     error_msg = "400 Bad Request - Invalid update data"
                 logging.error(error_msg)
                 return {"status": "error", "error": error_msg}
@@ -387,7 +338,7 @@ class GraphBetaClient:
             try:
                 error_details = response.json()
                 logging.error(f"Response body: {error_details}")
-            except Exception:
+            except ValueError:
                 logging.error(f"Response text: {response.text}")
 
             response.raise_for_status()
@@ -413,7 +364,7 @@ class GraphBetaClient:
             role_url = f"{self.base_url}/directoryRoleTemplates"
             logging.info(f"Fetching role template for '{role_name}'")
 
-            role_response = requests.get(role_url, headers=headers)
+            role_response = graph_session.get(role_url, headers=headers)
             if role_response.status_code != 200:
                 error_msg = f"Failed to fetch role templates: HTTP {role_response.status_code}"
                 logging.error(error_msg)
@@ -436,7 +387,7 @@ class GraphBetaClient:
             logging.info(f"Found role template ID: {role_template_id} for role: {role_name}")
 
             activated_roles_url = f"{self.base_url}/directoryRoles"
-            activated_response = requests.get(activated_roles_url, headers=headers)
+            activated_response = graph_session.get(activated_roles_url, headers=headers)
 
             if activated_response.status_code == 200:
                 activated_roles = activated_response.json().get("value", [])
@@ -446,7 +397,7 @@ class GraphBetaClient:
                     logging.info(f"Role '{role_name}' not activated in tenant. Activating...")
                     activate_data = {"roleTemplateId": role_template_id}
                     activate_url = f"{self.base_url}/directoryRoles"
-                    activate_response = requests.post(activate_url, headers=headers, json=activate_data)
+                    activate_response = graph_session.post(activate_url, headers=headers, json=activate_data)
 
                     if activate_response.status_code not in [200, 201]:
                         error_msg = f"Failed to activate role '{role_name}' in tenant: HTTP {activate_response.status_code}"
@@ -454,7 +405,7 @@ class GraphBetaClient:
                         return {"status": "error", "error": error_msg}
 
                     logging.info(f"Successfully activated role '{role_name}' in tenant")
-                    activated_response = requests.get(activated_roles_url, headers=headers)
+                    activated_response = graph_session.get(activated_roles_url, headers=headers)
                     if activated_response.status_code == 200:
                         activated_roles = activated_response.json().get("value", [])
                         activated_role = next((role for role in activated_roles if role.get("roleTemplateId") == role_template_id), None)
@@ -487,7 +438,7 @@ class GraphBetaClient:
                 f"Assigning role '{role_name}' to user {user_id}, using activated role ID: {role_template_id}, assignment URL: {assignment_url}, assignment data: {assignment_data}"
             )
 
-            assignment_response = requests.post(assignment_url, headers=headers, json=assignment_data)
+            assignment_response = graph_session.post(assignment_url, headers=headers, json=assignment_data)
 
             if assignment_response.status_code == 204:
                 logging.info(f"Successfully assigned role '{role_name}' to user {user_id}")
@@ -497,7 +448,7 @@ class GraphBetaClient:
                 try:
                     error_details = assignment_response.json()
                     error_msg += f" - {error_details.get('error', {}).get('message', 'Unknown error')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     pass
                 logging.error(error_msg)
                 return {"status": "error", "error": error_msg}
@@ -517,7 +468,7 @@ class GraphBetaClient:
             licenses_url = f"{self.base_url}/subscribedSkus"
             logging.info(f"Fetching available licenses for tenant {self.tenant_id}")
 
-            licenses_response = requests.get(licenses_url, headers=headers)
+            licenses_response = graph_session.get(licenses_url, headers=headers)
             if licenses_response.status_code != 200:
                 error_msg = f"Failed to fetch tenant licenses: HTTP {licenses_response.status_code}"
                 logging.error(error_msg)
@@ -564,7 +515,7 @@ class GraphBetaClient:
             logging.info(f"License assignment URL: {url}")
             logging.info(f"License data: {license_data}")
 
-            response = requests.post(url, headers=headers, json=license_data)
+            response = graph_session.post(url, headers=headers, json=license_data)
 
             if response.status_code == 200:
                 result = response.json()
@@ -575,7 +526,7 @@ class GraphBetaClient:
                 try:
                     error_details = response.json()
                     error_msg += f" - {error_details.get('error', {}).get('message', 'Unknown error')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     pass
                 logging.error(error_msg)
                 return {"status": "error", "error": error_msg}
@@ -596,13 +547,7 @@ class GraphBetaClient:
 
             data = {"accountEnabled": False}
 
-            response = requests.patch(url, headers=headers, json=data)
-
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 5))
-                logging.warning(f"Rate limited while disabling user - waiting {retry_after} seconds")
-                time.sleep(retry_after)
-                response = requests.patch(url, headers=headers, json=data)
+            response = _request_with_retry(self.tenant_id, "PATCH", url, headers=headers, json=data)
 
             if response.status_code == 401:
                 error_msg = f"401 Unauthorized - Cannot disable user {user_id}: Authentication failed"
@@ -648,22 +593,13 @@ class GraphBetaClient:
                 "Content-Type": "application/json",
             }
 
-            import secrets
-            import string
-
             temp_password = "".join(secrets.choice(string.ascii_letters + string.digits + "!@#$%&*") for _ in range(12))
 
             url = f"{self.base_url}/users/{user_id}"
 
             data = {"passwordProfile": {"password": temp_password, "forceChangePasswordNextSignIn": True}}
 
-            response = requests.patch(url, headers=headers, json=data)
-
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 5))
-                logging.warning(f"Rate limited while resetting password - waiting {retry_after} seconds")
-                time.sleep(retry_after)
-                response = requests.patch(url, headers=headers, json=data)
+            response = _request_with_retry(self.tenant_id, "PATCH", url, headers=headers, json=data)
 
             if response.status_code == 401:
                 error_msg = f"401 Unauthorized - Cannot reset password for user {user_id}: Authentication failed"
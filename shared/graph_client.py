@@ -1,6 +1,10 @@
+from contextlib import contextmanager
+import functools
 import json
 import logging
 import os
+import random
+import threading
 import time
 
 import msal
@@ -12,6 +16,120 @@ import requests
 # 2. These are legitimate API rate limits that must be respected
 # 3. The GraphClient is synchronous by design
 
+# Shared by every Graph client so tenant syncs reuse pooled keep-alive connections
+graph_session = requests.Session()
+graph_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=32))
+
+# Retries per request for throttled (429) or unavailable (503) Graph responses before giving up
+MAX_THROTTLE_RETRIES = 3
+
+
+def throttle_wait(response, attempt):
+    """Seconds to wait before retrying a throttled response: Retry-After if sent, else exponential backoff, plus jitter"""
+    try:
+        delay = float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        delay = min(30, 5 * 2 ** (attempt - 1))
+    return delay + random.uniform(0, 0.5)
+
+
+# Caps on in-flight Graph requests, overall and per tenant, to stay under Graph throttling limits
+_graph_slots = threading.BoundedSemaphore(32)
+_tenant_slots = {}
+_tenant_slots_lock = threading.Lock()
+
+
+@contextmanager
+def graph_request_slot(tenant_id):
+    """Hold one of the global and per-tenant Graph request slots for the duration of a call"""
+    with _tenant_slots_lock:
+        tenant_slot = _tenant_slots.get(tenant_id)
+        if tenant_slot is None:
+            tenant_slot = _tenant_slots[tenant_id] = threading.BoundedSemaphore(8)
+
+    with tenant_slot, _graph_slots:
+        yield
+
+
+@functools.lru_cache(maxsize=64)
+def get_msal_app(tenant_id):
+    """One MSAL app per tenant, so clients share its token cache and authority lookups go over the pooled session"""
+    return msal.ConfidentialClientApplication(
+        os.getenv("CLIENT_ID"),
+        authority=f"https://login.microsoftonline.com/{tenant_id}",
+        client_credential=os.getenv("CLIENT_SECRET"),
+        http_client=graph_session,
+    )
+
+
+# Bearer tokens per tenant as (token, expires_at), shared by every client instance
+_graph_tokens = {}
+_token_locks = {}
+_token_locks_lock = threading.Lock()
+
+
+def get_graph_token(tenant_id):
+    """Return the tenant's Graph token, acquiring it once and refreshing 5 minutes before expiry"""
+    token, expires_at = _graph_tokens.get(tenant_id, (None, 0))
+    if token and time.time() < expires_at:
+        return token
+
+    with _token_locks_lock:
+        token_lock = _token_locks.get(tenant_id)
+        if token_lock is None:
+            token_lock = _token_locks[tenant_id] = threading.Lock()
+
+    # Only one thread per tenant talks to MSAL; the rest pick up its token
+    with token_lock:
+        token, expires_at = _graph_tokens.get(tenant_id, (None, 0))
+        if token and time.time() < expires_at:
+            return token
+
+        result = get_msal_app(tenant_id).acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
+
+        if "access_token" in result:
+            token = result["access_token"]
+            _graph_tokens[tenant_id] = (token, time.time() + result.get("expires_in", 3600) - 300)
+            return token
+        else:
+            raise Exception(f"Token acquisition failed: {result.get('error', 'Unknown error')}")
+
+
+def _request_with_retry(tenant_id, method, url, **kwargs):
+    """Send one Graph request, retrying throttled (429) or unavailable (503) responses up to MAX_THROTTLE_RETRIES times"""
+    retries = 0
+    while True:
+        with graph_request_slot(tenant_id):
+            response = graph_session.request(method, url, **kwargs)
+
+        if response.status_code not in (429, 503) or retries >= MAX_THROTTLE_RETRIES:
+            return response
+
+        retries += 1
+        wait_time = throttle_wait(response, retries)
+        logging.warning(
+            f"Graph returned {response.status_code} for tenant {tenant_id} - retry {retries}/{MAX_THROTTLE_RETRIES} in {wait_time:.1f} seconds"
+        )
+        time.sleep(wait_time)
+
+
+def _post_batch(base_url, tenant_id, batch_requests):
+    """POST requests to base_url's $batch endpoint, 20 per round-trip (Graph limit), returning every sub-response"""
+    headers = {
+        "Authorization": f"Bearer {get_graph_token(tenant_id)}",
+        "Content-Type": "application/json",
+    }
+
+    url = f"{base_url}/$batch"
+    all_responses = []
+
+    for i in range(0, len(batch_requests), 20):
+        response = _request_with_retry(tenant_id, "POST", url, headers=headers, json={"requests": batch_requests[i : i + 20]})
+        response.raise_for_status()
+        all_responses.extend(response.json().get("responses", []))
+
+    return all_responses
+
 
 class GraphClient:
     def __init__(self, tenant_id):
@@ -19,30 +137,10 @@ class GraphClient:
             raise ValueError("TenantID is needed")
 
         self.tenant_id = tenant_id
-        self.client_id = os.getenv("CLIENT_ID")
-        self.client_secret = os.getenv("CLIENT_SECRET")
         self.base_url = "https://graph.microsoft.com/v1.0"
-        self.token = None
-        self.token_expires = 0
 
     def get_token(self):
-        if self.token and time.time() < self.token_expires:
-            return self.token
-
-        app = msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=f"https://login.microsoftonline.com/{self.tenant_id}",
-            client_credential=self.client_secret,
-        )
-
-        result = app.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
-
-        if "access_token" in result:
-            self.token = result["access_token"]
-            self.token_expires = time.time() + result.get("expires_in", 3600) - 300
-            return self.token
-        else:
-            raise Exception(f"Token acquisition failed: {result.get('error', 'Unknown error')}")
+        return get_graph_token(self.tenant_id)
 
     def get(
         self,
@@ -81,13 +179,8 @@ class GraphClient:
         while url:
             # Only use params for the first request, pagination URLs already include parameters
             current_params = params if not all_results else None
-            response = requests.get(url, headers=headers, params=current_params)
-
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 5))
-                logging.warning(f"Rate limited - waiting {retry_after} seconds")
-                time.sleep(retry_after)
-                continue
+            # Throttled or temporarily unavailable pages are retried a bounded number of times
+            response = _request_with_retry(self.tenant_id, "GET", url, headers=headers, params=current_params)
 
             # Enhanced error handling with detailed diagnostics
             if response.status_code == 401:
@@ -96,7 +189,7 @@ class GraphClient:
                     error_details = response.json()
                     if "error" in error_details:
                         error_msg += f"Error: {error_details['error'].get('code', 'Unknown')} - {error_details['error'].get('message', 'No details')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     error_msg += "Likely causes: Missing admin consent, expired credentials, or tenant suspended."
                 logging.error(error_msg)
                 raise requests.exceptions.HTTPError(error_msg, response=response)
@@ -107,21 +200,15 @@ class GraphClient:
                     error_details = response.json()
                     if "error" in error_details:
                         error_msg += f"Error: {error_details['error'].get('code', 'Unknown')} - {error_details['error'].get('message', 'No details')}"
-                except Exception:
+                except (ValueError, AttributeError):
                     error_msg += "Likely causes: Missing Graph permissions, conditional access policies, or security defaults."
                 logging.error(error_msg)
                 raise requests.exceptions.HTTPError(error_msg, response=response)
 
             elif response.status_code == 503:
-                error_msg = f"503 Service Unavailable - Tenant {self.tenant_id}: Microsoft Graph service temporarily unavailable."
-                logging.warning(error_msg + " Retrying after delay...")
-                # For service unavailable, implement exponential backoff
-                retry_count = getattr(self, "_retry_count", 0)
-                self._retry_count = retry_count + 1
-                wait_time = min(30, 5 * (2**retry_count))  # Max 30 seconds
-                logging.info(f"Waiting {wait_time} seconds before retry #{self._retry_count}")
-                time.sleep(wait_time)
-                continue
+                error_msg = f"503 Service Unavailable - Tenant {self.tenant_id}: Microsoft Graph service still unavailable after {MAX_THROTTLE_RETRIES} retries."
+                logging.error(error_msg)
+                raise requests.exceptions.HTTPError(error_msg, response=response)
 
             response.raise_for_status()
             data = response.json()
@@ -137,6 +224,10 @@ class GraphClient:
 
         return all_results
 
+    def batch(self, batch_requests):
+        """Send requests through the $batch endpoint, 20 per round-trip (Graph limit)"""
+        return _post_batch(self.base_url, self.tenant_id, batch_requests)
+
     def patch_user(self, user_id, update_data):
         """Update a user via PATCH request"""
         headers = {
@@ -145,13 +236,7 @@ class GraphClient:
         }
 
         url = f"{self.base_url}/users/{user_id}"
-        response = requests.patch(url, headers=headers, json=update_data)
-
-        if response.status_code == 429:
-            retry_after = int(response.headers.get("Retry-After", 5))
-            logging.warning(f"Rate limited - waiting {retry_after} seconds")
-            time.sleep(retry_after)
-            response = requests.patch(url, headers=headers, json=update_data)
+        response = _request_with_retry(self.tenant_id, "PATCH", url, headers=headers, json=update_data)
 
         response.raise_for_status()
         return response.json() if response.content else {}
@@ -164,13 +249,7 @@ class GraphClient:
         }
 
         url = f"{self.base_url}/users"
-        response = requests.post(url, headers=headers, json=user_data)
-
-        if response.status_code == 429:
-            retry_after = int(response.headers.get("Retry-After", 5))
-            logging.warning(f"Rate limited - waiting {retry_after} seconds")
-            time.sleep(retry_after)
-            response = requests.post(url, headers=headers, json=user_data)
+        response = _request_with_retry(self.tenant_id, "POST", url, headers=headers, json=user_data)
 
         response.raise_for_status()
         return response.json()
@@ -183,26 +262,59 @@ class GraphClient:
         }
 
         url = f"{self.base_url}/users/{user_id}"
-        response = requests.delete(url, headers=headers)
-
-        if response.status_code == 429:
-            retry_after = int(response.headers.get("Retry-After", 5))
-            logging.warning(f"Rate limited - waiting {retry_after} seconds")
-            time.sleep(retry_after)
-            response = requests.delete(url, headers=headers)
+        response = _request_with_retry(self.tenant_id, "DELETE", url, headers=headers)
 
         response.raise_for_status()
 
 
-def get_tenants():
-    environment = os.getenv("ENVIRONMENT")
-    if not hasattr(get_tenants, "_cached_tenants"):
-        with open("data/az_tenants.json") as f:
-            get_tenants._cached_tenants = json.load(f)
+# Default tenant list location, independent of the worker's current directory; TENANTS_FILE overrides it
+DEFAULT_TENANTS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "az_tenants.json")
+
+# Seconds between checks of the tenants file; 0 checks its mtime on every call
+TENANT_CACHE_TTL_SEC = int(os.getenv("TENANT_CACHE_TTL_SEC", "300"))
+
+# (checked_at, tenants, source, tenants_by_id) kept as one tuple so readers never see a half-updated entry;
+# source is (path, mtime, environment) of the load that produced the tenants
+_tenants_cache = {"entry": (0.0, None, None, {})}
+_tenants_lock = threading.Lock()
+
+
+def get_tenants(ttl=TENANT_CACHE_TTL_SEC):
+    """Return the tenant list, checking the tenants file for changes at most once per ttl seconds"""
+    # Fresh cache hits skip the lock so concurrent handlers don't queue behind each other
+    ts, tenants, _, _ = _tenants_cache["entry"]
+    if tenants is not None and time.monotonic() - ts <= ttl:
+        return tenants
+
+    with _tenants_lock:
+        now = time.monotonic()
+        ts, tenants, source, tenants_by_id = _tenants_cache["entry"]
+        if tenants is None or now - ts > ttl:
+            tenants_file = os.getenv("TENANTS_FILE", DEFAULT_TENANTS_FILE)
+            current_source = (tenants_file, os.stat(tenants_file).st_mtime_ns, os.getenv("ENVIRONMENT"))
+
+            # Only re-read and re-parse the file when it (or where it comes from) actually changed
+            if tenants is None or current_source != source:
+                with open(tenants_file) as f:
+                    tenants = json.load(f)
+
+                if os.getenv("ENVIRONMENT") == "dev":
+                    tenants = tenants[:10]
+
+                tenants_by_id = {t["tenant_id"]: t for t in tenants}
+
+            _tenants_cache["entry"] = (now, tenants, current_source, tenants_by_id)
+
+        return tenants
+
+
+def get_tenant_by_id(tenant_id, ttl=TENANT_CACHE_TTL_SEC):
+    """Return the tenant with this id from the cached tenant list, or None"""
+    get_tenants(ttl)
+    return _tenants_cache["entry"][3].get(tenant_id)
 
-        if environment == "dev":
-            get_tenants._cached_tenants = get_tenants._cached_tenants[:10]
-        elif environment == "prod":
-            get_tenants._cached_tenants = get_tenants._cached_tenants
 
-    return get_tenants._cached_tenants
+def invalidate_tenants_cache():
+    """Force the next get_tenants() call to reload the tenant list"""
+    with _tenants_lock:
+        _tenants_cache["entry"] = (0.0, None, None, {})
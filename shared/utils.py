@@ -1,8 +1,111 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import contextvars
 from datetime import datetime
-import json
+import functools
+import logging
+import os
 from typing import Any
 
 import azure.functions as func
+import orjson
+
+from db.db_client import query
+
+
+# Manual tenant-wide syncs block for minutes; running them here instead of the event loop's default executor keeps
+# a few concurrent syncs from starving the short asyncio.to_thread calls made by the read endpoints
+_http_sync_executor = ThreadPoolExecutor(max_workers=int(os.getenv("HTTP_SYNC_WORKERS", "4")), thread_name_prefix="http-sync")
+
+
+async def run_blocking_sync(sync_func, *args) -> Any:
+    """Run a blocking sync on the dedicated HTTP sync pool, keeping the invocation's context for logging"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_http_sync_executor, functools.partial(context.run, sync_func, *args))
+
+
+# Tenants synced in parallel by every per-tenant fan-out; tune against Graph throttling
+TENANT_SYNC_CONCURRENCY = int(os.getenv("TENANT_SYNC_CONCURRENCY", "5"))
+
+
+def run_per_tenant(tenants, sync_func, format_result=None, max_workers=TENANT_SYNC_CONCURRENCY, reverse=False) -> list[dict]:
+    """
+    Run sync_func(tenant_id, tenant_name) for every tenant on a thread pool and collect one result per tenant.
+
+    Args:
+        tenants: Tenant dicts from get_tenants()
+        sync_func: Per-tenant sync returning a dict with a "status" key
+        format_result: Optional format_result(tenant, result) building the entry for a successful sync, called as
+            each tenant finishes; without it the sync's own result is kept
+        max_workers: Upper bound on tenants synced at once
+        reverse: Submit tenants last to first, without copying the list
+
+    Returns:
+        Results in completion order; failed or raising syncs become {"status": "error", "tenant_id", "tenant_name", "error"}
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tenants)))) as executor:
+        ordered_tenants = reversed(tenants) if reverse else tenants
+        future_to_tenant = {executor.submit(sync_func, tenant["tenant_id"], tenant["display_name"]): tenant for tenant in ordered_tenants}
+
+        for future in as_completed(future_to_tenant):
+            tenant = future_to_tenant[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(clean_error_message(str(e), tenant_name=tenant["display_name"]))
+                error = str(e)
+            else:
+                if result["status"] != "error":
+                    results.append(format_result(tenant, result) if format_result else result)
+                    continue
+                error = result.get("error", "Unknown error")
+                logging.error(f"✗ {tenant['display_name']}: {error}")
+
+            results.append({"status": "error", "tenant_id": tenant["tenant_id"], "tenant_name": tenant["display_name"], "error": error})
+
+    return results
+
+
+def analyze_per_tenant(tenants, grouped_queries, analyze_tenant, analysis_type) -> tuple[list[dict], int]:
+    """
+    Run an analysis for every tenant from metrics loaded with one grouped query per table instead of one per tenant.
+
+    Args:
+        tenants: Tenant dicts from get_tenants()
+        grouped_queries: SQL grouped by tenant_id, each filtering with "tenant_id IN ({placeholders})"
+        analyze_tenant: analyze_tenant(tenant, rows) building the tenant's completed entry; rows holds the tenant's
+            row from each query in order, {} for a tenant the query has no rows for
+        analysis_type: Name used in log messages (e.g., "Groups")
+
+    Returns:
+        (results, failed_count); if the grouped queries fail, every tenant gets an error entry
+    """
+    tenant_ids = [tenant["tenant_id"] for tenant in tenants]
+    placeholders = ",".join("?" * len(tenant_ids))
+
+    try:
+        metrics = [{row["tenant_id"]: row for row in query(sql.format(placeholders=placeholders), tenant_ids)} for sql in grouped_queries]
+    except Exception as e:
+        logging.error(f"{analysis_type} analysis queries failed: {str(e)}")
+        results = [
+            {"status": "error", "tenant_id": tenant["tenant_id"], "tenant_name": tenant["display_name"], "error": str(e)}
+            for tenant in tenants
+        ]
+        return results, len(tenants)
+
+    results = []
+    failed_count = 0
+    for tenant in tenants:
+        try:
+            results.append(analyze_tenant(tenant, [tenant_metrics.get(tenant["tenant_id"], {}) for tenant_metrics in metrics]))
+        except Exception as e:
+            logging.error(f"✗ {tenant['display_name']}: {str(e)}")
+            failed_count += 1
+            results.append({"status": "error", "tenant_id": tenant["tenant_id"], "tenant_name": tenant["display_name"], "error": str(e)})
+
+    return results, failed_count
 
 
 def clean_error_message(error_str: str, context: str = "", tenant_name: str = "") -> str:
@@ -60,6 +163,25 @@ def clean_error_message(error_str: str, context: str = "", tenant_name: str = ""
             return f"✗ {error_str}"
 
 
+def _json_response(payload: dict[str, Any], status_code: int) -> func.HttpResponse:
+    # orjson returns bytes, which HttpResponse accepts as the body directly
+    return func.HttpResponse(orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS), status_code=status_code, mimetype="application/json")
+
+
+def get_json_body(req: func.HttpRequest) -> dict[str, Any]:
+    """Parse the request body as a JSON object, returning an empty dict when it is missing or malformed"""
+    raw_body = req.get_body()
+    if not raw_body:
+        return {}
+
+    try:
+        body = orjson.loads(raw_body)
+    except orjson.JSONDecodeError:
+        return {}
+
+    return body if isinstance(body, dict) else {}
+
+
 def create_metadata(tenant_id: str, tenant_name: str, operation: str, **additional_fields) -> dict[str, Any]:
     metadata = {
         "tenant_id": tenant_id,
@@ -117,7 +239,7 @@ def create_success_response(
     if actions:
         response_data["actions"] = create_actions(actions)
 
-    return func.HttpResponse(json.dumps(response_data, indent=2), status_code=200, headers={"Content-Type": "application/json"})
+    return _json_response(response_data, 200)
 
 
 def create_error_response(
@@ -146,7 +268,16 @@ def create_error_response(
     if actions:
         response_data["actions"] = create_actions(actions)
 
-    return func.HttpResponse(json.dumps(response_data, indent=2), status_code=status_code, headers={"Content-Type": "application/json"})
+    return _json_response(response_data, status_code)
+
+
+# The missing-tenant 400 never varies, so its body is serialized once at import
+_MISSING_TENANT_ID_BODY = orjson.dumps({"success": False, "error": "Tenant ID is required"})
+
+
+def create_missing_tenant_response() -> func.HttpResponse:
+    """Canonical 400 response for tenant-scoped endpoints called without a tenant_id"""
+    return func.HttpResponse(_MISSING_TENANT_ID_BODY, status_code=400, mimetype="application/json")
 
 
 def create_bulk_operation_response(
@@ -160,8 +291,13 @@ def create_bulk_operation_response(
     metadata = create_metadata(tenant_id, tenant_name, operation, **additional_metadata)
 
     # Calculate summary from results
-    successful = len([r for r in results if r.get("status") == "success"])
-    failed = len([r for r in results if r.get("status") == "error"])
+    successful = failed = 0
+    for r in results:
+        status = r.get("status")
+        if status == "success":
+            successful += 1
+        elif status == "error":
+            failed += 1
 
     metadata["summary"] = {"total": len(results), "successful": successful, "failed": failed}
 
@@ -180,4 +316,4 @@ def create_bulk_operation_response(
     else:
         status_code = 500  # All failed
 
-    return func.HttpResponse(json.dumps(response_data, indent=2), status_code=status_code, headers={"Content-Type": "application/json"})
+    return _json_response(response_data, status_code)